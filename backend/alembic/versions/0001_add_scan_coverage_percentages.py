@@ -0,0 +1,43 @@
+"""Add stored coverage percentage columns to scan_results
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+COVERAGE_EXPRESSIONS = {
+    'alt_text_coverage_percentage': (
+        "CASE WHEN total_images = 0 THEN 0 "
+        "ELSE round(images_with_alt * 100.0 / total_images, 2) END"
+    ),
+    'missing_alt_percentage': (
+        "CASE WHEN total_images = 0 THEN 0 "
+        "ELSE round(images_missing_alt * 100.0 / total_images, 2) END"
+    ),
+}
+
+
+def upgrade() -> None:
+    # Tables created by create_all on a fresh database already have the columns
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('scan_results')}
+    for name, expression in COVERAGE_EXPRESSIONS.items():
+        if name not in existing:
+            op.add_column(
+                'scan_results',
+                sa.Column(name, sa.Numeric(5, 2, asdecimal=False), sa.Computed(expression, persisted=True))
+            )
+
+
+def downgrade() -> None:
+    for name in COVERAGE_EXPRESSIONS:
+        op.drop_column('scan_results', name)
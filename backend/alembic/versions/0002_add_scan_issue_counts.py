@@ -0,0 +1,63 @@
+"""Add per-scan issue count columns to scan_results
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+ISSUE_COUNT_COLUMNS = ('missing_alt_count', 'empty_alt_count', 'short_alt_count', 'long_alt_count')
+
+# Same rules as count_image_issues in app.routers.scans: only non-decorative
+# images count; short/long apply to images that have alt text
+BACKFILL_ISSUE_COUNTS_SQL = """
+UPDATE scan_results
+SET missing_alt_count = counts.missing_alt,
+    empty_alt_count = counts.empty_alt,
+    short_alt_count = counts.short_alt,
+    long_alt_count = counts.long_alt
+FROM (
+    SELECT
+        scan_result_id,
+        SUM(CASE WHEN NOT has_alt_text THEN 1 ELSE 0 END) AS missing_alt,
+        SUM(CASE WHEN alt_text = '' THEN 1 ELSE 0 END) AS empty_alt,
+        SUM(CASE WHEN has_alt_text AND alt_text_length < 5 THEN 1 ELSE 0 END) AS short_alt,
+        SUM(CASE WHEN has_alt_text AND alt_text_length > 125 THEN 1 ELSE 0 END) AS long_alt
+    FROM image_details
+    WHERE NOT is_decorative
+    GROUP BY scan_result_id
+) AS counts
+WHERE scan_results.id = counts.scan_result_id
+"""
+
+
+def upgrade() -> None:
+    # Tables created by create_all on a fresh database already have the columns
+    existing = {column['name'] for column in sa.inspect(op.get_bind()).get_columns('scan_results')}
+    missing = [name for name in ISSUE_COUNT_COLUMNS if name not in existing]
+    for name in missing:
+        op.add_column(
+            'scan_results',
+            sa.Column(name, sa.Integer(), nullable=False, server_default='0')
+        )
+    
+    # Historical scans only have their image_details to count from
+    if missing:
+        op.execute(BACKFILL_ISSUE_COUNTS_SQL)
+    
+    # Issue counts are stored now, so nothing filters image_details on these flags
+    op.execute("DROP INDEX IF EXISTS ix_image_details_scan_flags")
+
+
+def downgrade() -> None:
+    for name in ISSUE_COUNT_COLUMNS:
+        op.drop_column('scan_results', name)
@@ -0,0 +1,42 @@
+"""Cascade scan deletes to image_details
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+FOREIGN_KEY_NAME = 'image_details_scan_result_id_fkey'
+
+
+def _replace_scan_foreign_key(ondelete) -> None:
+    """Recreate the image_details -> scan_results foreign key with the given ON DELETE rule."""
+    for foreign_key in sa.inspect(op.get_bind()).get_foreign_keys('image_details'):
+        if foreign_key['referred_table'] != 'scan_results':
+            continue
+        if (foreign_key['options'].get('ondelete') or '').upper() == (ondelete or '').upper():
+            return
+        op.drop_constraint(foreign_key['name'], 'image_details', type_='foreignkey')
+    
+    op.create_foreign_key(
+        FOREIGN_KEY_NAME, 'image_details', 'scan_results',
+        ['scan_result_id'], ['id'], ondelete=ondelete
+    )
+
+
+def upgrade() -> None:
+    # Deleting a scan relies on the database removing its images
+    _replace_scan_foreign_key('CASCADE')
+
+
+def downgrade() -> None:
+    _replace_scan_foreign_key(None)
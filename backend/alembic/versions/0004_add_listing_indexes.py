@@ -0,0 +1,61 @@
+"""Add composite indexes for analytics filters and listings
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+# Index name -> (table, columns) of the Index entries on the models; revision
+# 0005 adds the INCLUDE columns of ix_scan_results_user_created_id
+INDEXES = {
+    'ix_scan_results_user_status_created': (
+        'scan_results', ['user_id', 'scan_status', 'created_at']
+    ),
+    # Keyset pagination of a user's scans, newest first
+    'ix_scan_results_user_created_id': (
+        'scan_results', ['user_id', sa.text('created_at DESC'), sa.text('id DESC')]
+    ),
+    # Keyset pagination of a scan's images, optionally filtered on has_alt_text
+    'ix_image_details_scan_keyset': (
+        'image_details', ['scan_result_id', 'has_alt_text', 'created_at', 'id']
+    ),
+}
+
+# Valid flag of an index by name; no row if the index does not exist
+INDEX_VALID_SQL = sa.text("""
+SELECT i.indisvalid
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+WHERE c.relname = :name
+""")
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the tables writable during the build, but cannot
+    # run inside the migration transaction
+    with op.get_context().autocommit_block():
+        for name, (table, columns) in INDEXES.items():
+            valid = op.get_bind().execute(INDEX_VALID_SQL, {'name': name}).scalar()
+            if valid:
+                # Tables created by create_all on a fresh database already have it
+                continue
+            if valid is not None:
+                # Left behind INVALID by an interrupted concurrent build
+                op.drop_index(name, table_name=table, postgresql_concurrently=True)
+            op.create_index(name, table, columns, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, (table, columns) in INDEXES.items():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,61 @@
+"""Cover scan summaries in the scan listing index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = 'ix_scan_results_user_created_id'
+BUILD_NAME = 'ix_scan_results_user_created_id_build'
+INDEX_COLUMNS = ['user_id', sa.text('created_at DESC'), sa.text('id DESC')]
+
+# ScanResultSummary fields, so scan lists are served index-only
+INCLUDE_COLUMNS = [
+    'scan_status', 'url', 'total_images', 'images_with_alt',
+    'images_missing_alt', 'alt_text_coverage_percentage',
+]
+
+# Valid flag and whether the index has INCLUDE columns; no row if it does not exist
+INDEX_STATE_SQL = sa.text("""
+SELECT i.indisvalid, i.indnatts > i.indnkeyatts
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+WHERE c.relname = :name
+""")
+
+
+def _replace_listing_index(include) -> None:
+    """Rebuild the scan listing index with the given INCLUDE columns, unless it already matches."""
+    with op.get_context().autocommit_block():
+        state = op.get_bind().execute(INDEX_STATE_SQL, {'name': INDEX_NAME}).first()
+        if state is not None and state[0] and state[1] == bool(include):
+            # Tables created by create_all on a fresh database already match
+            return
+        
+        # Build the replacement under another name so listings keep an index
+        # until the swap; CONCURRENTLY cannot run inside a transaction
+        op.drop_index(BUILD_NAME, table_name='scan_results', postgresql_concurrently=True, if_exists=True)
+        op.create_index(
+            BUILD_NAME, 'scan_results', INDEX_COLUMNS,
+            postgresql_include=include, postgresql_concurrently=True
+        )
+        op.drop_index(INDEX_NAME, table_name='scan_results', postgresql_concurrently=True, if_exists=True)
+        op.execute(f"ALTER INDEX {BUILD_NAME} RENAME TO {INDEX_NAME}")
+
+
+def upgrade() -> None:
+    _replace_listing_index(INCLUDE_COLUMNS)
+
+
+def downgrade() -> None:
+    _replace_listing_index([])
@@ -1,14 +1,159 @@
-from datetime import datetime, timedelta
-from typing import Optional, Union
-from jose import JWTError, jwt
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import time
+from datetime import timedelta
+from typing import NamedTuple, Optional, Union
+import jwt
+import redis
 from passlib.context import CryptContext
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, load_only, raiseload
 from . import models, schemas
 from .config import settings
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+logger = logging.getLogger(__name__)
+
+# Password hashing context (native bcrypt backend, tunable cost factor).
+# With PASSWORD_HASH_SCHEME=argon2, new hashes use argon2id and bcrypt
+# hashes still verify but are marked deprecated, so they get upgraded on
+# the next successful login.
+if settings.password_hash_scheme == "argon2":
+    pwd_context = CryptContext(
+        schemes=["argon2", "bcrypt"],
+        deprecated="auto",
+        argon2__type="ID",
+        argon2__time_cost=2,
+        argon2__memory_cost=64 * 1024,
+        argon2__parallelism=2,
+        bcrypt__ident="2b",
+        bcrypt__rounds=settings.bcrypt_rounds
+    )
+else:
+    pwd_context = CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__ident="2b",
+        bcrypt__rounds=settings.bcrypt_rounds
+    )
+
+# JWT decode options, built once; every issued token carries exp and sub
+JWT_DECODE_OPTIONS = {"require": ["exp", "sub"]}
+
+# Bounds used to reject junk tokens before any decoding work
+JWT_MIN_LENGTH = 20
+JWT_MAX_LENGTH = 4096
+
+# HMAC algorithms signed directly with a pre-keyed template; anything
+# else is delegated to PyJWT
+HMAC_DIGESTS = {
+    "HS256": hashlib.sha256,
+    "HS384": hashlib.sha384,
+    "HS512": hashlib.sha512,
+}
+
+# Short-lived cache of verified credentials (seconds)
+LOGIN_CACHE_TTL = 300
+
+# In-process cache of users resolved from tokens: user_id -> (expires_at, user)
+USER_CACHE_TTL = 60
+USER_CACHE_MAX_SIZE = 10_000
+_user_cache: dict = {}
+
+# Authenticated users only need the profile columns; relationships must not
+# lazy-load from request handlers, and the password hash is left unloaded
+CURRENT_USER_LOAD_OPTIONS = (
+    load_only(
+        models.User.id,
+        models.User.email,
+        models.User.username,
+        models.User.is_active,
+        models.User.is_verified,
+        models.User.created_at,
+        models.User.updated_at
+    ),
+    raiseload("*"),
+)
+
+
+class TokenClaims(NamedTuple):
+    """Verified claims of an access token, used on the per-request auth path."""
+    user_id: int
+    email: str
+    exp: int
+
+
+def _b64url_encode(data: bytes) -> str:
+    """Encode bytes as unpadded base64url text."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64url_decode(data: str) -> bytes:
+    """Decode unpadded base64url text."""
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) & 3))
+
+
+# Signing settings are fixed for the process; resolve them once instead of
+# going through the settings object on every token.
+_SECRET_KEY = settings.secret_key
+_ALGORITHM = settings.algorithm
+
+# Key schedule and header are fixed for the process, so derive them once;
+# each token signature copies the keyed HMAC instead of re-padding the key.
+_JWT_DIGEST = HMAC_DIGESTS.get(_ALGORITHM)
+_JWT_SIGNER = (
+    hmac.new(_SECRET_KEY.encode(), digestmod=_JWT_DIGEST)
+    if _JWT_DIGEST else None
+)
+_JWT_HEADER_B64 = _b64url_encode(
+    json.dumps({"alg": _ALGORITHM, "typ": "JWT"}, separators=(",", ":")).encode()
+)
+_LOGIN_CACHE_SIGNER = hmac.new(_SECRET_KEY.encode(), digestmod=hashlib.sha256)
+
+
+def _sign_jwt(signing_input: bytes) -> bytes:
+    """Compute the HMAC signature for a JWT signing input."""
+    signer = _JWT_SIGNER.copy()
+    signer.update(signing_input)
+    return signer.digest()
+
+
+def _decode_hmac_token(token: str) -> dict:
+    """
+    Verify an HMAC-signed JWT issued by this service and return its claims.
+    
+    Args:
+        token: The JWT token to verify
+        
+    Returns:
+        dict: The decoded claims
+        
+    Raises:
+        ValueError: If the token is malformed, forged or expired
+    """
+    header_b64, payload_b64, signature_b64 = token.split(".", 2)
+    if header_b64 != _JWT_HEADER_B64:
+        raise ValueError("Unexpected token header")
+    
+    # Reject forgeries before paying for the payload JSON decode
+    signing_input = token[:len(header_b64) + len(payload_b64) + 1]
+    if not hmac.compare_digest(_sign_jwt(signing_input.encode("ascii")), _b64url_decode(signature_b64)):
+        raise ValueError("Signature verification failed")
+    
+    payload = json.loads(_b64url_decode(payload_b64))
+    if not isinstance(payload, dict):
+        raise ValueError("Invalid token payload")
+    for claim in JWT_DECODE_OPTIONS["require"]:
+        if claim not in payload:
+            raise ValueError(f"Token is missing the '{claim}' claim")
+    if payload["exp"] <= time.time():
+        raise ValueError("Token has expired")
+    return payload
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -27,7 +172,7 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """
-    Hash a password using bcrypt.
+    Hash a password using the configured scheme.
     
     Args:
         password: The plain text password
@@ -38,6 +183,36 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """
+    Verify a password without blocking the event loop.
+    
+    Bcrypt is deliberately CPU-expensive, so the check runs on the
+    default executor instead of the event-loop thread.
+    
+    Args:
+        plain_password: The plain text password
+        hashed_password: The hashed password from database
+        
+    Returns:
+        bool: True if password matches, False otherwise
+    """
+    return await asyncio.to_thread(pwd_context.verify, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """
+    Hash a password without blocking the event loop.
+    
+    Args:
+        password: The plain text password
+        
+    Returns:
+        str: The hashed password
+    """
+    return await asyncio.to_thread(pwd_context.hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Create a JWT access token.
@@ -50,17 +225,20 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         str: The encoded JWT token
     """
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
+    if not expires_delta:
+        expires_delta = timedelta(minutes=settings.access_token_expire_minutes)
+    
+    to_encode.update({"exp": int(time.time() + expires_delta.total_seconds())})
+    if _JWT_SIGNER is None:
+        return jwt.encode(to_encode, _SECRET_KEY, algorithm=_ALGORITHM)
     
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
-    return encoded_jwt
+    payload_b64 = _b64url_encode(json.dumps(to_encode, separators=(",", ":")).encode())
+    signing_input = f"{_JWT_HEADER_B64}.{payload_b64}"
+    signature_b64 = _b64url_encode(_sign_jwt(signing_input.encode("ascii")))
+    return f"{signing_input}.{signature_b64}"
 
 
-def verify_token(token: str) -> Optional[schemas.TokenData]:
+def verify_token(token: str) -> TokenClaims:
     """
     Verify and decode a JWT token.
     
@@ -68,7 +246,10 @@ def verify_token(token: str) -> Optional[schemas.TokenData]:
         token: The JWT token to verify
         
     Returns:
-        TokenData: The decoded token data or None if invalid
+        TokenClaims: The user ID, email and expiry from the token
+        
+    Raises:
+        HTTPException: If the token is invalid or expired
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -76,21 +257,43 @@ def verify_token(token: str) -> Optional[schemas.TokenData]:
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    # Cheap structural checks first: three segments and a sane length
+    if token.count(".") != 2 or not JWT_MIN_LENGTH <= len(token) <= JWT_MAX_LENGTH:
+        raise credentials_exception
+    
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
-        user_id: int = payload.get("sub")
-        email: str = payload.get("email")
-        
-        if user_id is None or email is None:
-            raise credentials_exception
-            
-        token_data = schemas.TokenData(user_id=user_id, email=email)
-        return token_data
-    except JWTError:
+        if _JWT_SIGNER is None:
+            payload = jwt.decode(
+                token,
+                _SECRET_KEY,
+                algorithms=[_ALGORITHM],
+                options=JWT_DECODE_OPTIONS
+            )
+        else:
+            payload = _decode_hmac_token(token)
+        return TokenClaims(int(payload["sub"]), payload["email"], payload["exp"])
+    except (jwt.PyJWTError, KeyError, ValueError, TypeError):
         raise credentials_exception
 
 
-def authenticate_user(db: Session, email: str, password: str) -> Union[models.User, bool]:
+def verify_token_to_schema(token: str) -> schemas.TokenData:
+    """
+    Verify a JWT token and return its claims as a TokenData schema.
+    
+    Args:
+        token: The JWT token to verify
+        
+    Returns:
+        TokenData: The decoded token data
+        
+    Raises:
+        HTTPException: If the token is invalid or expired
+    """
+    user_id, email, exp = verify_token(token)
+    return schemas.TokenData(user_id=user_id, email=email, exp=exp)
+
+
+async def authenticate_user(db: Session, email: str, password: str) -> Union[models.User, bool]:
     """
     Authenticate a user with email and password.
     
@@ -102,14 +305,114 @@ def authenticate_user(db: Session, email: str, password: str) -> Union[models.Us
     Returns:
         User: The authenticated user or False if authentication fails
     """
+    cache_key = _login_cache_key(email, password)
+    cached_user_id = await _get_cached_login(cache_key)
+    if cached_user_id is not None:
+        user = get_user_by_id(db, cached_user_id)
+        if user and user.email == email:
+            return user
+    
     user = db.query(models.User).filter(models.User.email == email).first()
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    
+    verified, new_hash = await asyncio.to_thread(
+        pwd_context.verify_and_update, password, user.hashed_password
+    )
+    if not verified:
         return False
+    
+    # Upgrade hashes from a deprecated scheme while the password is at hand
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
+    
+    await _cache_login(cache_key, user.id)
     return user
 
 
+def _login_cache_key(email: str, password: str) -> str:
+    """
+    Build the Redis key for a verified credential pair.
+    
+    Only an HMAC of the credentials is stored, never the password itself.
+    
+    Args:
+        email: User's email address
+        password: User's plain text password
+        
+    Returns:
+        str: Redis cache key
+    """
+    signer = _LOGIN_CACHE_SIGNER.copy()
+    signer.update(f"{email}:{password}".encode())
+    digest = signer.hexdigest()
+    return f"login:{digest}"
+
+
+async def _get_cached_login(cache_key: str) -> Optional[int]:
+    """
+    Look up the user ID cached for a verified credential pair.
+    
+    Args:
+        cache_key: Key from _login_cache_key
+        
+    Returns:
+        int: The cached user ID, or None on miss or Redis failure
+    """
+    from .dependencies import get_redis_client
+    
+    try:
+        cached_user_id = await get_redis_client().get(cache_key)
+    except redis.RedisError as e:
+        logger.warning(f"Login cache lookup failed: {str(e)}")
+        return None
+    return int(cached_user_id) if cached_user_id else None
+
+
+async def _cache_login(cache_key: str, user_id: int) -> None:
+    """
+    Cache a verified credential pair and track it for invalidation.
+    
+    Args:
+        cache_key: Key from _login_cache_key
+        user_id: ID of the authenticated user
+    """
+    from .dependencies import get_redis_client
+    
+    user_keys = f"login_keys:{user_id}"
+    try:
+        pipe = get_redis_client().pipeline()
+        pipe.setex(cache_key, LOGIN_CACHE_TTL, user_id)
+        pipe.sadd(user_keys, cache_key)
+        pipe.expire(user_keys, LOGIN_CACHE_TTL)
+        await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Login cache write failed: {str(e)}")
+
+
+async def invalidate_user_cache(user_id: int) -> None:
+    """
+    Drop all cached credentials and token lookups for a user.
+    
+    Called whenever the user's email or account status changes.
+    
+    Args:
+        user_id: User's ID
+    """
+    from .dependencies import get_redis_client
+    
+    _user_cache.pop(user_id, None)
+    
+    index_keys = [f"login_keys:{user_id}", f"user_tokens:{user_id}"]
+    try:
+        client = get_redis_client()
+        cache_keys = await client.sunion(index_keys)
+        await client.delete(*index_keys, *cache_keys)
+    except redis.RedisError as e:
+        logger.warning(f"User cache invalidation failed: {str(e)}")
+
+
 def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
     """
     Get a user by email address.
@@ -149,10 +452,41 @@ def get_user_by_id(db: Session, user_id: int) -> Optional[models.User]:
     Returns:
         User: The user if found, None otherwise
     """
-    return db.query(models.User).filter(models.User.id == user_id).first()
+    return db.get(models.User, user_id)
+
+
+def get_user_by_id_cached(db: Session, user_id: int) -> Optional[models.User]:
+    """
+    Get a user by ID through a short-lived in-process cache.
+    
+    Only the profile columns are loaded (see CURRENT_USER_LOAD_OPTIONS).
+    Cached users are detached from their session, so callers must not
+    modify them; use get_user_by_id for read-modify-write paths.
+    
+    Args:
+        db: Database session
+        user_id: User's ID
+        
+    Returns:
+        User: The user if found, None otherwise
+    """
+    now = time.monotonic()
+    cached = _user_cache.get(user_id)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    user = db.get(models.User, user_id, options=CURRENT_USER_LOAD_OPTIONS)
+    if user is None:
+        return None
+    
+    db.expunge(user)
+    if len(_user_cache) >= USER_CACHE_MAX_SIZE:
+        _user_cache.pop(next(iter(_user_cache)))
+    _user_cache[user_id] = (now + USER_CACHE_TTL, user)
+    return user
 
 
-def create_user(db: Session, user: schemas.UserCreate) -> models.User:
+async def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     """
     Create a new user.
     
@@ -163,21 +497,8 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     Returns:
         User: The created user
     """
-    # Check if user already exists
-    if get_user_by_email(db, user.email):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
-    
-    if get_user_by_username(db, user.username):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
-        )
-    
-    # Create new user
-    hashed_password = get_password_hash(user.password)
+    # Create new user; uniqueness is enforced by the email/username indexes
+    hashed_password = await hash_password_async(user.password)
     db_user = models.User(
         email=user.email,
         username=user.username,
@@ -187,12 +508,25 @@ def create_user(db: Session, user: schemas.UserCreate) -> models.User:
     )
     
     db.add(db_user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        if get_user_by_email(db, user.email):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Email already registered"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Username already taken"
+        )
+    
     db.refresh(db_user)
     return db_user
 
 
-def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> Optional[models.User]:
+async def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> Optional[models.User]:
     """
     Update a user's information.
     
@@ -204,23 +538,32 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> O
     Returns:
         User: The updated user or None if not found
     """
-    db_user = get_user_by_id(db, user_id)
+    update_data = user_update.dict(exclude_unset=True)
+    
+    # Load the user and any email/username conflicts in one query
+    conditions = [models.User.id == user_id]
+    if "email" in update_data:
+        conditions.append(models.User.email == update_data["email"])
+    if "username" in update_data:
+        conditions.append(models.User.username == update_data["username"])
+    
+    matches = db.query(models.User).filter(or_(*conditions)).all()
+    db_user = next((match for match in matches if match.id == user_id), None)
     if not db_user:
         return None
-    
-    update_data = user_update.dict(exclude_unset=True)
+    others = [match for match in matches if match.id != user_id]
     
     # Check for email conflicts
-    if "email" in update_data and update_data["email"] != db_user.email:
-        if get_user_by_email(db, update_data["email"]):
+    if "email" in update_data:
+        if any(other.email == update_data["email"] for other in others):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already registered"
             )
     
     # Check for username conflicts
-    if "username" in update_data and update_data["username"] != db_user.username:
-        if get_user_by_username(db, update_data["username"]):
+    if "username" in update_data:
+        if any(other.username == update_data["username"] for other in others):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already taken"
@@ -231,10 +574,11 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate) -> O
     
     db.commit()
     db.refresh(db_user)
+    await invalidate_user_cache(user_id)
     return db_user
 
 
-def deactivate_user(db: Session, user_id: int) -> bool:
+async def deactivate_user(db: Session, user_id: int) -> bool:
     """
     Deactivate a user account.
     
@@ -251,4 +595,5 @@ def deactivate_user(db: Session, user_id: int) -> bool:
     
     db_user.is_active = False
     db.commit()
+    await invalidate_user_cache(user_id)
     return True
@@ -1,6 +1,6 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy.pool import StaticPool
 from typing import Generator
 from .config import settings
@@ -8,18 +8,26 @@ from .config import settings
 # Database URL from config
 DATABASE_URL = settings.database_url
 
+# Server-side statement timeout (PostgreSQL only)
+connect_args = {}
+if DATABASE_URL.startswith("postgresql"):
+    connect_args["options"] = f"-c statement_timeout={settings.db_statement_timeout_ms}"
+
 # Create SQLAlchemy engine
 engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,
-    pool_recycle=300,  # Recycle connections every 5 minutes
-    pool_size=10,      # Number of connections to maintain
-    max_overflow=20,   # Additional connections that can be created
+    pool_pre_ping=settings.db_pre_ping,  # pool_recycle already retires stale connections
+    pool_recycle=settings.db_pool_recycle,  # Seconds before a pooled connection is replaced
+    pool_size=settings.db_pool_size,        # Number of connections to maintain
+    max_overflow=settings.db_max_overflow,  # Additional connections that can be created
+    query_cache_size=2000,  # Compiled SQL cache shared across requests
+    connect_args=connect_args,
     echo=False  # Set to True for SQL query logging
 )
 
-# Create SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Create SessionLocal class; sessions are request-scoped, so loaded objects
+# are kept after commit instead of being re-selected on next access
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 
 # Create Base class for models
 Base = declarative_base()
@@ -44,6 +52,21 @@ def get_db() -> Generator:
             pass
 
 
+def release_connection(db: Session) -> None:
+    """
+    End the session's current transaction so its connection goes back to
+    the pool right away instead of when the request finishes.
+    
+    Loaded objects stay usable (expire_on_commit=False) and the session
+    checks out a connection again if it is queried later. Only call this
+    after read-only work; pending changes would be committed.
+    
+    Args:
+        db: Database session
+    """
+    db.commit()
+
+
 def create_tables():
     """
     Create all tables in the database.
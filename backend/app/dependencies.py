@@ -1,30 +1,113 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from typing import Annotated, Optional
 import redis
-import json
+import redis.asyncio
+from redis.commands.core import AsyncScript
+import hashlib
+import logging
+import time
 from datetime import datetime, timedelta
 
-from .database import get_db
+from .database import get_db, release_connection
 from . import auth, models
 from .config import settings
 
+logger = logging.getLogger(__name__)
+
 # OAuth2 scheme for token authentication
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login", auto_error=False)
+
+# Redis connection for caching (async client, created during app startup)
+redis_client: Optional[redis.asyncio.Redis] = None
+
+# Upper bound for token -> user_id cache entries (seconds)
+TOKEN_CACHE_TTL = 300
+
+# Lifetime of per-user daily scan counters (a day plus slack, seconds)
+SCAN_COUNTER_TTL = 90000
+
+# Atomically count a scan against the daily limit in one round trip.
+# Returns -1 if the counter has not been seeded yet, 0 if the limit is
+# reached (the increment is undone), otherwise the new count.
+SCAN_LIMIT_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return -1
+end
+local count = redis.call("INCR", KEYS[1])
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+if count > tonumber(ARGV[1]) then
+    redis.call("DECR", KEYS[1])
+    return 0
+end
+return count
+"""
 
-# Redis connection for caching
-redis_client = None
+# Give back a counted scan that never produced a result. Only touches an
+# existing, positive counter so a refund can't create or underflow one.
+SCAN_REFUND_SCRIPT = """
+if tonumber(redis.call("GET", KEYS[1]) or "0") > 0 then
+    return redis.call("DECR", KEYS[1])
+end
+return 0
+"""
 
+# Script objects are built and hashed once; given bytes they need no client,
+# and each call passes the client to run on
+scan_limit_script = AsyncScript(None, SCAN_LIMIT_SCRIPT.encode())
+scan_refund_script = AsyncScript(None, SCAN_REFUND_SCRIPT.encode())
 
-def get_redis_client():
-    """Get Redis client connection."""
+# Lifetime of cached analytics responses (seconds)
+ANALYTICS_CACHE_TTL = 300
+
+# Lifetime of cached scan and scan image responses (seconds)
+SCAN_CACHE_TTL = 300
+
+# Lifetime of shared scanner output for identical URLs (seconds)
+SCAN_PAYLOAD_CACHE_TTL = 600
+
+
+def get_redis_client() -> redis.asyncio.Redis:
+    """Get the shared async Redis client, creating it if startup has not run."""
     global redis_client
     if redis_client is None:
-        redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+        redis_client = redis.asyncio.from_url(
+            settings.redis_url,
+            max_connections=64,
+            socket_keepalive=True
+        )
     return redis_client
 
 
+async def init_redis_client() -> redis.asyncio.Redis:
+    """
+    Create the Redis client and open its first connection.
+    
+    Called from the application lifespan so the first request does not
+    pay for connection setup.
+    
+    Returns:
+        Redis: The shared async Redis client
+    """
+    client = get_redis_client()
+    try:
+        await client.ping()
+    except redis.RedisError as e:
+        logger.warning(f"Redis not reachable at startup: {str(e)}")
+    return client
+
+
+async def close_redis_client() -> None:
+    """Close the shared Redis client and its connection pool."""
+    global redis_client
+    if redis_client is not None:
+        await redis_client.aclose()
+        redis_client = None
+
+
 async def get_current_user(
     token: Annotated[str, Depends(oauth2_scheme)],
     db: Session = Depends(get_db)
@@ -49,22 +132,22 @@ async def get_current_user(
     )
     
     try:
-        # Check Redis cache first
+        # Check Redis cache first (keyed by a digest, never the raw token)
         redis_client = get_redis_client()
-        cache_key = f"user_token:{token}"
-        cached_user = redis_client.get(cache_key)
+        cache_key = f"tok:{hashlib.blake2b(token.encode(), digest_size=16).hexdigest()}"
+        cached_user_id = await redis_client.get(cache_key)
         
-        if cached_user:
-            user_data = json.loads(cached_user)
-            return models.User(**user_data)
+        token_exp = None
+        if cached_user_id:
+            user_id = int(cached_user_id)
+        else:
+            # Verify token
+            user_id, _, token_exp = auth.verify_token(token)
         
-        # Verify token
-        token_data = auth.verify_token(token)
-        if token_data.user_id is None:
-            raise credentials_exception
-        
-        # Get user from database
-        user = auth.get_user_by_id(db, user_id=token_data.user_id)
+        # Get user from database, handing the connection back before the
+        # rest of the request runs
+        user = auth.get_user_by_id_cached(db, user_id=user_id)
+        release_connection(db)
         if user is None:
             raise credentials_exception
         
@@ -74,17 +157,16 @@ async def get_current_user(
                 detail="Inactive user account"
             )
         
-        # Cache user data for 5 minutes
-        user_dict = {
-            "id": user.id,
-            "email": user.email,
-            "username": user.username,
-            "is_active": user.is_active,
-            "is_verified": user.is_verified,
-            "created_at": user.created_at.isoformat(),
-            "updated_at": user.updated_at.isoformat()
-        }
-        redis_client.setex(cache_key, 300, json.dumps(user_dict, default=str))
+        if token_exp is not None:
+            # Cache the user ID, never beyond the token's own expiry
+            ttl = min(TOKEN_CACHE_TTL, int(token_exp - time.time()))
+            if ttl > 0:
+                user_tokens = f"user_tokens:{user.id}"
+                pipe = redis_client.pipeline()
+                pipe.set(cache_key, user.id, ex=ttl)
+                pipe.sadd(user_tokens, cache_key)
+                pipe.expire(user_tokens, TOKEN_CACHE_TTL)
+                await pipe.execute()
         
         return user
     except Exception as e:
@@ -137,8 +219,8 @@ async def get_current_verified_user(
     return current_user
 
 
-def get_optional_current_user(
-    token: Annotated[Optional[str], Depends(oauth2_scheme)],
+async def get_optional_current_user(
+    token: Annotated[Optional[str], Depends(optional_oauth2_scheme)],
     db: Session = Depends(get_db)
 ) -> Optional[models.User]:
     """
@@ -155,7 +237,7 @@ def get_optional_current_user(
         return None
     
     try:
-        return get_current_user(token, db)
+        return await get_current_user(token, db)
     except HTTPException:
         return None
 
@@ -190,7 +272,7 @@ def rate_limit_by_ip(request) -> str:
     if hasattr(request, 'headers'):
         forwarded_for = request.headers.get('x-forwarded-for')
         if forwarded_for:
-            client_ip = forwarded_for.split(',')[0].strip()
+            client_ip = forwarded_for.partition(',')[0].strip()
     
     return f"ip:{client_ip}"
 
@@ -205,7 +287,7 @@ def get_user_scans_limit() -> int:
     return 100  # Configurable limit
 
 
-def check_user_scan_limit(
+async def check_user_scan_limit(
     current_user: Annotated[models.User, Depends(get_current_user)],
     db: Session = Depends(get_db)
 ) -> bool:
@@ -222,28 +304,122 @@ def check_user_scan_limit(
     Raises:
         HTTPException: If user has reached scan limit
     """
-    from .models import ScanResult
-    
-    # Count user's scans in the last 24 hours
-    from datetime import datetime, timedelta
-    yesterday = datetime.utcnow() - timedelta(days=1)
-    
-    recent_scans = db.query(ScanResult).filter(
-        ScanResult.user_id == current_user.id,
-        ScanResult.created_at >= yesterday
-    ).count()
-    
     max_scans = get_user_scans_limit()
+    limit_exception = HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=f"Scan limit exceeded. Maximum {max_scans} scans per day."
+    )
     
-    if recent_scans >= max_scans:
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail=f"Scan limit exceeded. Maximum {max_scans} scans per day."
+    # Count user's scans for the current UTC day in a Redis counter
+    today = datetime.utcnow().date()
+    start_of_day = datetime.combine(today, datetime.min.time())
+    counter_key = f"scans:{current_user.id}:{today.isoformat()}"
+    
+    try:
+        redis_client = get_redis_client()
+        
+        # Check, increment and refresh the TTL in a single EVALSHA
+        scan_count = await scan_limit_script(
+            keys=[counter_key], args=[max_scans, SCAN_COUNTER_TTL], client=redis_client
         )
+        
+        # Seed the counter from the database on the first scan of the day
+        if scan_count == -1:
+            await redis_client.set(
+                counter_key,
+                _count_scans_since(db, current_user.id, start_of_day),
+                ex=SCAN_COUNTER_TTL,
+                nx=True
+            )
+            scan_count = await scan_limit_script(
+                keys=[counter_key], args=[max_scans, SCAN_COUNTER_TTL], client=redis_client
+            )
+        
+        if scan_count == 0:
+            raise limit_exception
+    except redis.RedisError as e:
+        logger.warning(f"Scan counter unavailable, counting in database: {str(e)}")
+        if _count_scans_since(db, current_user.id, start_of_day) >= max_scans:
+            raise limit_exception
     
     return True
 
 
+async def refund_user_scan(current_user: models.User) -> None:
+    """
+    Undo the counter increment for a scan that failed before it was saved.
+    
+    Args:
+        current_user: User the scan was counted against
+    """
+    counter_key = f"scans:{current_user.id}:{datetime.utcnow().date().isoformat()}"
+    
+    try:
+        await scan_refund_script(keys=[counter_key], client=get_redis_client())
+    except redis.RedisError as e:
+        logger.warning(f"Failed to refund scan count for user {current_user.id}: {str(e)}")
+
+
+def _count_scans_since(db: Session, user_id: int, since: datetime) -> int:
+    """
+    Count a user's scans created since the given time.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        since: Lower bound for created_at
+        
+    Returns:
+        int: Number of scans
+    """
+    return db.query(func.count(models.ScanResult.id)).filter(
+        models.ScanResult.user_id == user_id,
+        models.ScanResult.created_at >= since
+    ).scalar() or 0
+
+
+def analytics_version_key(user_id: int) -> str:
+    """Redis key holding the user's analytics cache version."""
+    return f"analytics:v:{user_id}"
+
+
+async def invalidate_analytics_cache(user_id: int) -> None:
+    """
+    Invalidate cached analytics for a user.
+    
+    Bumps the per-user version embedded in every analytics cache key, so
+    results cached before a scan changed are never served again.
+    
+    Args:
+        user_id: User ID
+    """
+    try:
+        await get_redis_client().incr(analytics_version_key(user_id))
+    except redis.RedisError as e:
+        logger.warning(f"Failed to invalidate analytics cache for user {user_id}: {str(e)}")
+
+
+def scan_version_key(scan_id: int) -> str:
+    """Redis key holding the scan's response cache version."""
+    return f"scan:v:{scan_id}"
+
+
+async def invalidate_scan_cache(scan_id: int) -> None:
+    """
+    Invalidate cached responses for a scan.
+    
+    Bumps the per-scan version embedded in every scan cache key, so the
+    scan and its image pages are reloaded after a retry or delete.
+    
+    Args:
+        scan_id: Scan ID
+    """
+    try:
+        await get_redis_client().incr(scan_version_key(scan_id))
+    except redis.RedisError as e:
+        logger.warning(f"Failed to invalidate scan cache for scan {scan_id}: {str(e)}")
+
+
 def get_database_session() -> Session:
     """
     Get database session for dependency injection.
@@ -254,12 +430,12 @@ def get_database_session() -> Session:
     return next(get_db())
 
 
-def get_redis_connection():
+def get_redis_connection() -> redis.asyncio.Redis:
     """
     Get Redis connection for dependency injection.
     
     Returns:
-        Redis: Redis connection
+        Redis: Async Redis connection
     """
     return get_redis_client()
 
@@ -270,4 +446,4 @@ CurrentActiveUser = Annotated[models.User, Depends(get_current_active_user)]
 CurrentVerifiedUser = Annotated[models.User, Depends(get_current_verified_user)]
 OptionalCurrentUser = Annotated[Optional[models.User], Depends(get_optional_current_user)]
 DatabaseSession = Annotated[Session, Depends(get_db)]
-RedisConnection = Annotated[redis.Redis, Depends(get_redis_connection)]
+RedisConnection = Annotated[redis.asyncio.Redis, Depends(get_redis_connection)]
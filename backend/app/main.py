@@ -1,23 +1,39 @@
 from fastapi import FastAPI, HTTPException, status
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
+from fastapi.responses import ORJSONResponse, Response
+from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
+import asyncio
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
+import time
+import orjson
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
 from .database import create_tables
+from .dependencies import init_redis_client, close_redis_client
+from .services.scanner import get_http_client, close_http_client
 from .routers import auth, scans, analytics, export, health
 from .config import settings
+from .middleware import CombinedMiddleware, limiter
 
-# Configure logging
+# Configure logging; handlers run on a background thread so request
+# paths only enqueue records instead of writing to the stream
 logging.basicConfig(level=logging.INFO)
+_root_logger = logging.getLogger()
+_log_queue = queue.Queue(-1)
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, *_root_logger.handlers, respect_handler_level=True
+)
+_root_logger.handlers = [logging.handlers.QueueHandler(_log_queue)]
+_log_listener.start()
+atexit.register(_log_listener.stop)
+logging.getLogger("app.routers").setLevel(settings.router_log_level)
 logger = logging.getLogger(__name__)
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
-
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -27,10 +43,23 @@ async def lifespan(app: FastAPI):
     create_tables()
     logger.info("Database tables created/verified")
     
+    # Dedicated threads for blocking work such as password hashing
+    executor = ThreadPoolExecutor(max_workers=(os.cpu_count() or 1) * 2)
+    asyncio.get_running_loop().set_default_executor(executor)
+    
+    # Warm the shared Redis connection pool
+    app.state.redis = await init_redis_client()
+    
+    # Shared HTTP client so page fetches reuse pooled connections
+    app.state.http_client = get_http_client()
+    
     yield
     
     # Shutdown
     logger.info("Shutting down Alt Audit API...")
+    await close_redis_client()
+    await close_http_client()
+    executor.shutdown(wait=False)
 
 
 # Create FastAPI application
@@ -41,16 +70,17 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
-# Add CORS middleware
+# Security headers, CORS and request logging in one middleware
 app.add_middleware(
-    CORSMiddleware,
+    CombinedMiddleware,
     allow_origins=settings.backend_cors_origins_list,
-    allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Add rate limiting
@@ -67,16 +97,25 @@ app.include_router(export.router, prefix=settings.api_v1_str)
 app.include_router(health.router, prefix=settings.api_v1_str)
 
 
+# Static root payload, serialized once at import
+ROOT_BODY = orjson.dumps({
+    "message": "Alt Audit API",
+    "version": "1.0.0",
+    "status": "healthy",
+    "docs": "/docs",
+    "redoc": "/redoc"
+})
+
+
+def utc_timestamp() -> str:
+    """Current UTC time as an ISO 8601 string with second precision."""
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+
+
 @app.get("/", tags=["health"])
 async def root():
     """Root endpoint with API information."""
-    return {
-        "message": "Alt Audit API",
-        "version": "1.0.0",
-        "status": "healthy",
-        "docs": "/docs",
-        "redoc": "/redoc"
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
 
 
 @app.get("/health", tags=["health"])
@@ -84,7 +123,7 @@ async def health_check():
     """Health check endpoint."""
     return {
         "status": "healthy",
-        "timestamp": "2024-01-01T00:00:00Z",
+        "timestamp": utc_timestamp(),
         "version": "1.0.0"
     }
 
@@ -92,13 +131,14 @@ async def health_check():
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "detail": exc.detail,
             "error_code": getattr(exc, 'error_code', 'HTTP_ERROR'),
-            "timestamp": "2024-01-01T00:00:00Z"
-        }
+            "timestamp": utc_timestamp()
+        },
+        headers=getattr(exc, 'headers', None)
     )
 
 
@@ -106,12 +146,12 @@ async def http_exception_handler(request, exc):
 async def general_exception_handler(request, exc):
     """General exception handler for unhandled errors."""
     logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "detail": "Internal server error",
             "error_code": "INTERNAL_ERROR",
-            "timestamp": "2024-01-01T00:00:00Z"
+            "timestamp": utc_timestamp()
         }
     )
 
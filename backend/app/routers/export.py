@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.responses import Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 import logging
 
@@ -10,6 +10,15 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/export", tags=["export"])
 
+# Characters replaced when deriving a download filename from a scan URL,
+# including everything that could break out of the Content-Disposition value
+FILENAME_TRANSLATION = str.maketrans({
+    char: "_" for char in "/\\:?&=#%;,\" \r\n\t"
+})
+
+# Maximum length of the URL part of a download filename
+FILENAME_URL_MAX_LENGTH = 80
+
 
 @router.get("/scans/{scan_id}/details/csv")
 async def export_scan_details_csv(
@@ -26,7 +35,7 @@ async def export_scan_details_csv(
         db: Database session
         
     Returns:
-        Response: CSV file download
+        StreamingResponse: CSV file download
         
     Raises:
         HTTPException: If scan not found or access denied
@@ -46,12 +55,13 @@ async def export_scan_details_csv(
             )
         
         exporter = DataExporter(db)
-        csv_content = exporter.export_scan_details_csv(scan_id)
         
-        filename = f"scan_details_{scan_id}_{scan.url.replace('/', '_').replace(':', '_')}.csv"
+        safe_url = scan.url[:FILENAME_URL_MAX_LENGTH].translate(FILENAME_TRANSLATION)
+        filename = f"scan_details_{scan_id}_{safe_url}.csv"
         
-        return Response(
-            content=csv_content,
+        # Rows are streamed from a server-side cursor as they are encoded
+        return StreamingResponse(
+            exporter.iter_scan_details_csv(scan_id),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename={filename}"}
         )
@@ -59,7 +69,7 @@ async def export_scan_details_csv(
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"Error exporting scan details CSV: {str(e)}")
+        logger.error("Error exporting scan details CSV: %s", e, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to export scan details"
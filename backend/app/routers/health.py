@@ -1,8 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy import text
 from sqlalchemy.orm import Session
-import redis
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+import redis.asyncio
+import asyncio
 import logging
+import time
 from datetime import datetime
 
 from ..database import get_db
@@ -13,6 +16,56 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/health", tags=["health"])
 
+# How long a dependency probe result is reused, so bursts of orchestrator
+# and monitor probes share one SELECT 1 / PING (seconds)
+HEALTH_CHECK_TTL = 1.0
+
+# Check name -> (monotonic time of the probe, error message or None)
+_health_check_cache: Dict[str, Tuple[float, Optional[str]]] = {}
+
+
+async def run_cached_check(name: str, check: Callable[[], Awaitable[None]]) -> Optional[str]:
+    """
+    Run a dependency probe, reusing its result for HEALTH_CHECK_TTL seconds.
+    
+    Args:
+        name: Check name used as the cache key
+        check: Coroutine function that raises if the dependency is unhealthy
+        
+    Returns:
+        Optional[str]: Error message, or None if the dependency is healthy
+    """
+    now = time.monotonic()
+    cached = _health_check_cache.get(name)
+    if cached is not None and now - cached[0] < HEALTH_CHECK_TTL:
+        return cached[1]
+    
+    try:
+        await check()
+        error = None
+    except Exception as e:
+        logger.error("%s health check failed: %s", name.capitalize(), e)
+        error = str(e)
+    
+    _health_check_cache[name] = (now, error)
+    return error
+
+
+async def check_database(db: Session) -> Optional[str]:
+    """Probe database connectivity (cached)."""
+    async def probe():
+        await asyncio.to_thread(db.execute, text("SELECT 1"))
+    
+    return await run_cached_check("database", probe)
+
+
+async def check_redis(redis_conn: redis.asyncio.Redis) -> Optional[str]:
+    """Probe Redis connectivity (cached)."""
+    async def probe():
+        await redis_conn.ping()
+    
+    return await run_cached_check("redis", probe)
+
 
 @router.get("/")
 async def health_check():
@@ -33,7 +86,7 @@ async def health_check():
 @router.get("/detailed")
 async def detailed_health_check(
     db: Session = Depends(get_db),
-    redis_conn: redis.Redis = Depends(get_redis_connection)
+    redis_conn: redis.asyncio.Redis = Depends(get_redis_connection)
 ):
     """
     Detailed health check including database and Redis connectivity.
@@ -56,33 +109,32 @@ async def detailed_health_check(
         "checks": {}
     }
     
-    # Check database connectivity
-    try:
-        db.execute(text("SELECT 1"))
+    # Check database and Redis connectivity concurrently
+    db_error, redis_error = await asyncio.gather(
+        check_database(db), check_redis(redis_conn)
+    )
+    
+    if db_error is None:
         health_status["checks"]["database"] = {
             "status": "healthy",
             "message": "Database connection successful"
         }
-    except Exception as e:
-        logger.error(f"Database health check failed: {str(e)}")
+    else:
         health_status["checks"]["database"] = {
             "status": "unhealthy",
-            "message": f"Database connection failed: {str(e)}"
+            "message": f"Database connection failed: {db_error}"
         }
         health_status["status"] = "unhealthy"
     
-    # Check Redis connectivity
-    try:
-        redis_conn.ping()
+    if redis_error is None:
         health_status["checks"]["redis"] = {
             "status": "healthy",
             "message": "Redis connection successful"
         }
-    except Exception as e:
-        logger.error(f"Redis health check failed: {str(e)}")
+    else:
         health_status["checks"]["redis"] = {
             "status": "unhealthy",
-            "message": f"Redis connection failed: {str(e)}"
+            "message": f"Redis connection failed: {redis_error}"
         }
         health_status["status"] = "unhealthy"
     
@@ -100,7 +152,7 @@ async def detailed_health_check(
             }
         }
     except Exception as e:
-        logger.error(f"Configuration health check failed: {str(e)}")
+        logger.error("Configuration health check failed: %s", e, exc_info=True)
         health_status["checks"]["configuration"] = {
             "status": "unhealthy",
             "message": f"Configuration check failed: {str(e)}"
@@ -120,7 +172,7 @@ async def detailed_health_check(
 @router.get("/ready")
 async def readiness_check(
     db: Session = Depends(get_db),
-    redis_conn: redis.Redis = Depends(get_redis_connection)
+    redis_conn: redis.asyncio.Redis = Depends(get_redis_connection)
 ):
     """
     Readiness check for Kubernetes/container orchestration.
@@ -135,28 +187,27 @@ async def readiness_check(
     Raises:
         HTTPException: If service is not ready
     """
-    try:
-        # Check database
-        db.execute(text("SELECT 1"))
-        
-        # Check Redis
-        redis_conn.ping()
-        
-        return {
-            "status": "ready",
-            "timestamp": datetime.utcnow().isoformat()
-        }
-        
-    except Exception as e:
-        logger.error(f"Readiness check failed: {str(e)}")
+    # Check database and Redis concurrently
+    db_error, redis_error = await asyncio.gather(
+        check_database(db), check_redis(redis_conn)
+    )
+    error = db_error or redis_error
+    
+    if error is not None:
+        logger.error("Readiness check failed: %s", error)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail={
                 "status": "not_ready",
-                "message": str(e),
+                "message": error,
                 "timestamp": datetime.utcnow().isoformat()
             }
         )
+    
+    return {
+        "status": "ready",
+        "timestamp": datetime.utcnow().isoformat()
+    }
 
 
 @router.get("/live")
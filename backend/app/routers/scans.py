@@ -1,23 +1,61 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Query, Response
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from pydantic import TypeAdapter
+from sqlalchemy import delete, insert, lambda_stmt, select, tuple_, update
+from sqlalchemy.orm import Session, load_only, raiseload
+from typing import List, Optional, Tuple
 from datetime import datetime, timedelta
+import asyncio
+import base64
+import hashlib
 import logging
+import orjson
+import redis
+import redis.asyncio
 
-from ..database import get_db
-from ..dependencies import CurrentUser, DatabaseSession
+from ..database import get_db, release_connection
+from ..dependencies import (
+    SCAN_CACHE_TTL,
+    SCAN_PAYLOAD_CACHE_TTL,
+    CurrentUser,
+    DatabaseSession,
+    RedisConnection,
+    invalidate_analytics_cache,
+    invalidate_scan_cache,
+    refund_user_scan,
+    scan_version_key,
+)
 from .. import schemas, models
 from ..services.scanner import URLScanner
 from ..services.export import DataExporter
 from ..utils.exceptions import ValidationError, SecurityError, ScanError
 from ..utils.validators import validate_url_safe
-from slowapi import Limiter
-from slowapi.util import get_remote_address
+from ..middleware import limiter
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/scans", tags=["scans"])
-limiter = Limiter(key_func=get_remote_address)
+
+# Scan responses embed no relationships; any lazy load during serialization is a bug
+SCAN_LOAD_OPTIONS = (raiseload("*"),)
+
+# Only the ScanResultSummary columns, all of which the list index covers
+SCAN_SUMMARY_LOAD_OPTIONS = (
+    load_only(
+        models.ScanResult.id,
+        models.ScanResult.url,
+        models.ScanResult.total_images,
+        models.ScanResult.images_with_alt,
+        models.ScanResult.images_missing_alt,
+        models.ScanResult.scan_status,
+        models.ScanResult.alt_text_coverage_percentage,
+        models.ScanResult.created_at,
+    ),
+    raiseload("*"),
+)
+
+# Built once so list endpoints validate whole pages in a single pydantic-core call
+SCAN_SUMMARY_LIST_ADAPTER = TypeAdapter(List[schemas.ScanResultSummary])
+IMAGE_DETAIL_LIST_ADAPTER = TypeAdapter(List[schemas.ImageDetailResponse])
 
 
 @router.post("/", response_model=schemas.ScanResultResponse)
@@ -27,7 +65,7 @@ async def create_scan(
     scan_data: schemas.ScanResultCreate,
     current_user: CurrentUser,
     db: DatabaseSession,
-    response: Response
+    redis_conn: RedisConnection
 ):
     """
     Create a new URL scan and return results immediately.
@@ -36,7 +74,7 @@ async def create_scan(
         scan_data: Scan creation data
         current_user: Current authenticated user
         db: Database session
-        response: FastAPI response object
+        redis_conn: Redis connection for the shared scan result cache
         
     Returns:
         ScanResultResponse: Scan result with analysis (201 Created on success)
@@ -44,57 +82,47 @@ async def create_scan(
     Raises:
         HTTPException: If scan creation fails (400, 403, 422, 500)
     """
+    # Set while the scan is counted against the limit but not yet saved
+    refundable = False
     try:
+        # Validate URL before it is charged against the daily limit
+        validated_url = await validate_url_safe(scan_data.url)
+        
         # Check if user has reached scan limit
         from ..dependencies import check_user_scan_limit
-        check_user_scan_limit(current_user, db)
+        await check_user_scan_limit(current_user, db)
+        refundable = True
         
-        # Validate URL
-        validated_url = validate_url_safe(scan_data.url)
+        # Don't hold a pooled connection while the page is being scanned
+        release_connection(db)
         logger.info(f"Starting scan for URL: {validated_url}")
         
-        # Run scan directly
-        async with URLScanner() as scanner:
-            results = await scanner.scan_url(validated_url)
+        # Run scan, reusing a recent result for the same URL
+        results = await scan_url_cached(redis_conn, validated_url)
         
         # Create scan record in database with results
-        db_scan = models.ScanResult(
+        scan_values = dict(
             url=validated_url,
             user_id=current_user.id,
-            scan_status=results['scan_status'],
-            total_images=results['total_images'],
-            images_with_alt=results['images_with_alt'],
-            images_missing_alt=results['images_missing_alt'],
-            scan_duration_ms=results['scan_duration_ms'],
-            error_message=results.get('error_message')
+            **scan_result_values(results)
         )
         
-        db.add(db_scan)
-        db.commit()
-        db.refresh(db_scan)
-        
-        # Save image details
-        for img_data in results.get('images', []):
-            image_detail = models.ImageDetail(
-                scan_result_id=db_scan.id,
-                image_url=img_data['url'],
-                alt_text=img_data['alt_text'],
-                has_alt_text=img_data['has_alt_text'],
-                alt_text_length=img_data['alt_text_length'],
-                image_width=img_data.get('width'),
-                image_height=img_data.get('height'),
-                is_decorative=img_data['is_decorative']
-            )
-            db.add(image_detail)
-        
-        db.commit()
+        # Save scan and image details off the event loop
+        db_scan = await asyncio.to_thread(create_scan_results, db, scan_values, results.get('images', []))
+        refundable = False
+        await invalidate_analytics_cache(current_user.id)
         
         logger.info(f"Completed scan {db_scan.id} for user {current_user.id}: {results['total_images']} images, "
                    f"{results['coverage_percentage']:.1f}% coverage")
         
-        response.status_code = status.HTTP_201_CREATED
-        return schemas.ScanResultResponse.from_orm(db_scan)
+        # Serialize once here; returning the model would be re-validated by response_model
+        return scan_json_response(
+            {b"body": scan_response(db_scan).model_dump_json().encode()},
+            status_code=status.HTTP_201_CREATED
+        )
         
+    except HTTPException:
+        raise
     except ValidationError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -107,12 +135,16 @@ async def create_scan(
         )
     except ScanError as e:
         logger.error(f"Scan error for URL {scan_data.url}: {str(e)}")
+        if refundable:
+            await refund_user_scan(current_user)
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
             detail=f"Scan failed: {str(e)}"
         )
     except Exception as e:
         logger.error(f"Error creating scan: {str(e)}")
+        if refundable:
+            await refund_user_scan(current_user)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to create scan"
@@ -125,6 +157,7 @@ async def get_user_scans(
     db: DatabaseSession,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor; overrides skip"),
     status_filter: Optional[str] = Query(None, description="Filter by scan status"),
     start_date: Optional[datetime] = Query(None, description="Start date filter"),
     end_date: Optional[datetime] = Query(None, description="End date filter")
@@ -137,6 +170,7 @@ async def get_user_scans(
         db: Database session
         skip: Number of records to skip
         limit: Number of records to return
+        cursor: Optional keyset cursor returned by the previous page
         status_filter: Optional status filter
         start_date: Optional start date filter
         end_date: Optional end date filter
@@ -145,21 +179,49 @@ async def get_user_scans(
         List[ScanResultSummary]: List of scan results
     """
     try:
-        query = db.query(models.ScanResult).filter(models.ScanResult.user_id == current_user.id)
+        user_id = current_user.id
+        
+        # Lambda statements cache their compiled SQL per filter combination
+        stmt = lambda_stmt(
+            lambda: select(models.ScanResult)
+            .options(*SCAN_SUMMARY_LOAD_OPTIONS)
+            .where(models.ScanResult.user_id == user_id)
+        )
         
         # Apply filters
         if status_filter:
-            query = query.filter(models.ScanResult.scan_status == status_filter)
+            stmt += lambda s: s.where(models.ScanResult.scan_status == status_filter)
         if start_date:
-            query = query.filter(models.ScanResult.created_at >= start_date)
+            stmt += lambda s: s.where(models.ScanResult.created_at >= start_date)
         if end_date:
-            query = query.filter(models.ScanResult.created_at <= end_date)
+            stmt += lambda s: s.where(models.ScanResult.created_at <= end_date)
         
-        # Apply pagination and ordering
-        scans = query.order_by(models.ScanResult.created_at.desc()).offset(skip).limit(limit).all()
+        # Seek past the cursor instead of skipping rows when one is given
+        if cursor:
+            cursor_created_at, cursor_id = decode_cursor(cursor, datetime, int)
+            stmt += lambda s: s.where(
+                tuple_(models.ScanResult.created_at, models.ScanResult.id) < tuple_(cursor_created_at, cursor_id)
+            )
+            skip = 0
         
-        return [schemas.ScanResultSummary.from_orm(scan) for scan in scans]
+        # Apply pagination and ordering
+        stmt += lambda s: s.order_by(
+            models.ScanResult.created_at.desc(), models.ScanResult.id.desc()
+        ).offset(skip).limit(limit)
+        scans = await asyncio.to_thread(fetch_all, db, stmt)
+        
+        next_cursor = None
+        if len(scans) == limit:
+            next_cursor = encode_cursor(scans[-1].created_at, scans[-1].id)
+        
+        # Serialize straight to JSON bytes instead of letting FastAPI re-validate the models
+        content = SCAN_SUMMARY_LIST_ADAPTER.dump_json(
+            SCAN_SUMMARY_LIST_ADAPTER.validate_python(scans, from_attributes=True)
+        )
+        return scan_json_response({b"body": content, b"next_cursor": (next_cursor or "").encode()})
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting user scans: {str(e)}")
         raise HTTPException(
@@ -172,7 +234,8 @@ async def get_user_scans(
 async def get_scan(
     scan_id: int,
     current_user: CurrentUser,
-    db: DatabaseSession
+    db: DatabaseSession,
+    redis_conn: RedisConnection
 ):
     """
     Get a specific scan result.
@@ -181,6 +244,7 @@ async def get_scan(
         scan_id: Scan ID
         current_user: Current authenticated user
         db: Database session
+        redis_conn: Redis connection for the response cache
         
     Returns:
         ScanResultResponse: Scan result details
@@ -189,10 +253,11 @@ async def get_scan(
         HTTPException: If scan not found or access denied
     """
     try:
-        scan = db.query(models.ScanResult).filter(
-            models.ScanResult.id == scan_id,
-            models.ScanResult.user_id == current_user.id
-        ).first()
+        cache_key, cached = await get_cached_scan_response(redis_conn, scan_id, current_user.id, "detail")
+        if cached:
+            return scan_json_response(cached)
+        
+        scan = await asyncio.to_thread(get_owned_scan, db, scan_id, current_user.id)
         
         if not scan:
             raise HTTPException(
@@ -200,7 +265,9 @@ async def get_scan(
                 detail="Scan not found"
             )
         
-        return schemas.ScanResultResponse.from_orm(scan)
+        content = scan_response(scan).model_dump_json().encode()
+        await cache_scan_response(redis_conn, cache_key, content)
+        return scan_json_response({b"body": content})
         
     except HTTPException:
         raise
@@ -217,8 +284,10 @@ async def get_scan_images(
     scan_id: int,
     current_user: CurrentUser,
     db: DatabaseSession,
+    redis_conn: RedisConnection,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(50, ge=1, le=200, description="Number of records to return"),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor; overrides skip"),
     has_alt_only: Optional[bool] = Query(None, description="Filter by alt text presence")
 ):
     """
@@ -228,8 +297,10 @@ async def get_scan_images(
         scan_id: Scan ID
         current_user: Current authenticated user
         db: Database session
+        redis_conn: Redis connection for the response cache
         skip: Number of records to skip
         limit: Number of records to return
+        cursor: Optional keyset cursor returned by the previous page
         has_alt_only: Filter by alt text presence
         
     Returns:
@@ -239,30 +310,67 @@ async def get_scan_images(
         HTTPException: If scan not found or access denied
     """
     try:
-        # Verify scan ownership
-        scan = db.query(models.ScanResult).filter(
-            models.ScanResult.id == scan_id,
-            models.ScanResult.user_id == current_user.id
-        ).first()
+        cache_key, cached = await get_cached_scan_response(
+            redis_conn, scan_id, current_user.id, "images", skip, limit, cursor, has_alt_only
+        )
+        if cached:
+            return scan_json_response(cached)
         
-        if not scan:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Scan not found"
-            )
+        user_id = current_user.id
         
-        # Query images
-        query = db.query(models.ImageDetail).filter(models.ImageDetail.scan_result_id == scan_id)
+        # Query images joined to the scan so ownership is enforced in the same statement
+        stmt = lambda_stmt(
+            lambda: select(models.ImageDetail)
+            .join(models.ScanResult, models.ScanResult.id == models.ImageDetail.scan_result_id)
+            .where(models.ScanResult.id == scan_id, models.ScanResult.user_id == user_id)
+        )
         
         if has_alt_only is not None:
-            query = query.filter(models.ImageDetail.has_alt_text == has_alt_only)
+            stmt += lambda s: s.where(models.ImageDetail.has_alt_text == has_alt_only)
+        
+        # Seek past the cursor instead of skipping rows when one is given
+        if cursor:
+            cursor_has_alt, cursor_created_at, cursor_id = decode_cursor(cursor, bool, datetime, int)
+            stmt += lambda s: s.where(
+                tuple_(
+                    models.ImageDetail.has_alt_text,
+                    models.ImageDetail.created_at,
+                    models.ImageDetail.id
+                ) > tuple_(cursor_has_alt, cursor_created_at, cursor_id)
+            )
+            skip = 0
         
-        images = query.order_by(
+        stmt += lambda s: s.order_by(
             models.ImageDetail.has_alt_text.asc(),  # False (missing alt) first, then True (with alt)
-            models.ImageDetail.created_at.asc()     # Secondary sort by creation time
-        ).offset(skip).limit(limit).all()
-        
-        return [schemas.ImageDetailResponse.from_orm(img) for img in images]
+            models.ImageDetail.created_at.asc(),    # Secondary sort by creation time
+            models.ImageDetail.id.asc()             # Tie-breaker so the cursor is unique
+        ).offset(skip).limit(limit)
+        images = await asyncio.to_thread(fetch_all, db, stmt)
+        
+        # An empty page only needs a second lookup to tell "no images" from "no scan"
+        if not images:
+            owned = await asyncio.to_thread(
+                db.query(models.ScanResult.id).filter(
+                    models.ScanResult.id == scan_id,
+                    models.ScanResult.user_id == current_user.id
+                ).first
+            )
+            if not owned:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Scan not found"
+                )
+        
+        next_cursor = None
+        if len(images) == limit:
+            last = images[-1]
+            next_cursor = encode_cursor(last.has_alt_text, last.created_at, last.id)
+        
+        content = IMAGE_DETAIL_LIST_ADAPTER.dump_json(
+            IMAGE_DETAIL_LIST_ADAPTER.validate_python(images, from_attributes=True)
+        )
+        await cache_scan_response(redis_conn, cache_key, content, next_cursor)
+        return scan_json_response({b"body": content, b"next_cursor": (next_cursor or "").encode()})
         
     except HTTPException:
         raise
@@ -292,23 +400,17 @@ async def delete_scan(
         HTTPException: If scan not found or access denied
     """
     try:
-        scan = db.query(models.ScanResult).filter(
-            models.ScanResult.id == scan_id,
-            models.ScanResult.user_id == current_user.id
-        ).first()
+        # Delete scan and its image details off the event loop, scoped to the owner
+        deleted = await asyncio.to_thread(delete_scan_results, db, scan_id, current_user.id)
         
-        if not scan:
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Scan not found"
             )
         
-        # Delete associated image details first
-        db.query(models.ImageDetail).filter(models.ImageDetail.scan_result_id == scan_id).delete()
-        
-        # Delete scan
-        db.delete(scan)
-        db.commit()
+        await invalidate_scan_cache(scan_id)
+        await invalidate_analytics_cache(current_user.id)
         
         logger.info(f"Deleted scan {scan_id} for user {current_user.id}")
         
@@ -328,8 +430,7 @@ async def retry_scan(
     request: Request,
     scan_id: int,
     current_user: CurrentUser,
-    db: DatabaseSession,
-    response: Response
+    db: DatabaseSession
 ):
     """
     Retry a failed scan and return results immediately.
@@ -338,7 +439,6 @@ async def retry_scan(
         scan_id: Scan ID
         current_user: Current authenticated user
         db: Database session
-        response: FastAPI response object
         
     Returns:
         ScanResultResponse: Updated scan result with analysis (200 OK on success)
@@ -347,63 +447,52 @@ async def retry_scan(
         HTTPException: If scan not found or retry fails (400, 403, 404, 422, 500)
     """
     try:
-        scan = db.query(models.ScanResult).filter(
-            models.ScanResult.id == scan_id,
-            models.ScanResult.user_id == current_user.id
-        ).first()
+        # Ownership, status gate and reset in one UPDATE ... RETURNING; its
+        # commit also frees the pooled connection while the page is scanned
+        scan = await asyncio.to_thread(claim_scan_for_retry, db, scan_id, current_user.id)
         
         if not scan:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Scan not found"
-            )
-        
-        if scan.scan_status not in ["failed", "pending"]:
+            # Only a rejected claim pays for a lookup to pick the right error
+            if not await asyncio.to_thread(get_owned_scan, db, scan_id, current_user.id):
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="Scan not found"
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Can only retry failed or pending scans"
             )
         
-        # Validate URL
-        validated_url = validate_url_safe(scan.url)
-        logger.info(f"Retrying scan {scan_id} for URL: {validated_url}")
-        
-        # Run scan directly
-        async with URLScanner() as scanner:
-            results = await scanner.scan_url(validated_url)
-        
-        # Update scan with results
-        scan.scan_status = results['scan_status']
-        scan.total_images = results['total_images']
-        scan.images_with_alt = results['images_with_alt']
-        scan.images_missing_alt = results['images_missing_alt']
-        scan.scan_duration_ms = results['scan_duration_ms']
-        scan.error_message = results.get('error_message')
-        
-        # Clear existing image details
-        db.query(models.ImageDetail).filter(models.ImageDetail.scan_result_id == scan_id).delete()
-        
-        # Save new image details
-        for img_data in results.get('images', []):
-            image_detail = models.ImageDetail(
-                scan_result_id=scan_id,
-                image_url=img_data['url'],
-                alt_text=img_data['alt_text'],
-                has_alt_text=img_data['has_alt_text'],
-                alt_text_length=img_data['alt_text_length'],
-                image_width=img_data.get('width'),
-                image_height=img_data.get('height'),
-                is_decorative=img_data['is_decorative']
+        # The claim reset the scan to pending; drop any cached copy of the old state
+        await invalidate_scan_cache(scan_id)
+        
+        try:
+            # Validate URL
+            validated_url = await validate_url_safe(scan.url)
+            logger.info(f"Retrying scan {scan_id} for URL: {validated_url}")
+            
+            # Run scan directly
+            async with URLScanner() as scanner:
+                results = await scanner.scan_url(validated_url)
+            
+            # Store results and replace image details off the event loop
+            scan = await asyncio.to_thread(
+                save_scan_results, db, scan_id, scan_result_values(results), results.get('images', [])
             )
-            db.add(image_detail)
+        except Exception as e:
+            # Don't leave the claimed scan stuck in pending
+            error_message = str(e) if isinstance(e, (ValidationError, SecurityError, ScanError)) else "Failed to retry scan"
+            await asyncio.to_thread(mark_scan_failed, db, scan_id, error_message)
+            await invalidate_scan_cache(scan_id)
+            raise
         
-        db.commit()
+        await invalidate_scan_cache(scan_id)
+        await invalidate_analytics_cache(current_user.id)
         
         logger.info(f"Completed retry scan {scan_id}: {results['total_images']} images, "
                    f"{results['coverage_percentage']:.1f}% coverage")
         
-        response.status_code = status.HTTP_200_OK
-        return schemas.ScanResultResponse.from_orm(scan)
+        return scan_json_response({b"body": scan_response(scan).model_dump_json().encode()})
         
     except HTTPException:
         raise
@@ -431,3 +520,432 @@ async def retry_scan(
         )
 
 
+async def scan_url_cached(redis_conn: redis.asyncio.Redis, url: str) -> dict:
+    """
+    Scan a URL, reusing a recent completed result for the same URL.
+    
+    Scanner output is shared across users for SCAN_PAYLOAD_CACHE_TTL seconds,
+    keyed by a hash of the validated URL; each caller still gets its own
+    scan rows. Failed scans are never cached.
+    
+    Args:
+        redis_conn: Redis connection
+        url: Validated URL to scan
+        
+    Returns:
+        dict: Scanner results
+    """
+    cache_key = f"scan_payload:{hashlib.sha256(url.encode()).hexdigest()}"
+    try:
+        cached = await redis_conn.get(cache_key)
+        if cached:
+            logger.info("Reusing cached scan result for %s", url)
+            return orjson.loads(cached)
+    except redis.RedisError as e:
+        logger.warning("Scan result cache unavailable: %s", e)
+        cache_key = None
+    
+    async with URLScanner() as scanner:
+        results = await scanner.scan_url(url)
+    
+    if cache_key is not None and results.get('scan_status') == 'completed':
+        try:
+            await redis_conn.setex(cache_key, SCAN_PAYLOAD_CACHE_TTL, orjson.dumps(results))
+        except redis.RedisError as e:
+            logger.warning("Failed to cache scan result: %s", e)
+    
+    return results
+
+
+def scan_response(scan: models.ScanResult) -> schemas.ScanResultResponse:
+    """
+    Build a scan response from a database row without re-validating it.
+    
+    Rows come from our own database, so field validation is skipped with
+    model_construct. Only the values whose Python type differs from the
+    schema are converted. Keep model_validate for anything client-supplied.
+    
+    Args:
+        scan: Scan record
+        
+    Returns:
+        ScanResultResponse: Response model for the scan
+    """
+    values = {name: getattr(scan, name) for name in schemas.ScanResultResponse.model_fields}
+    values['scan_status'] = schemas.ScanStatus(scan.scan_status)
+    values['alt_text_coverage_percentage'] = float(scan.alt_text_coverage_percentage)
+    values['missing_alt_percentage'] = float(scan.missing_alt_percentage)
+    return schemas.ScanResultResponse.model_construct(**values)
+
+
+def scan_result_values(results: dict) -> dict:
+    """
+    Map scanner results onto ScanResult column values.
+    
+    Args:
+        results: Scanner results
+        
+    Returns:
+        dict: Column values for the scan's status, totals and issue counts
+    """
+    return dict(
+        scan_status=results['scan_status'],
+        total_images=results['total_images'],
+        images_with_alt=results['images_with_alt'],
+        images_missing_alt=results['images_missing_alt'],
+        scan_duration_ms=results['scan_duration_ms'],
+        error_message=results.get('error_message'),
+        **count_image_issues(results.get('images', []))
+    )
+
+
+def count_image_issues(images: List[dict]) -> dict:
+    """
+    Count accessibility issues over a scan's non-decorative images.
+    
+    Args:
+        images: Image data from the scanner
+        
+    Returns:
+        dict: ScanResult issue count columns and their values
+    """
+    counts = {
+        'missing_alt_count': 0,
+        'empty_alt_count': 0,
+        'short_alt_count': 0,
+        'long_alt_count': 0
+    }
+    
+    for img_data in images:
+        if img_data['is_decorative']:
+            continue
+        
+        if not img_data['has_alt_text']:
+            counts['missing_alt_count'] += 1
+        else:
+            alt_text_length = img_data['alt_text_length']
+            if alt_text_length is not None and alt_text_length < 5:
+                counts['short_alt_count'] += 1
+            elif alt_text_length is not None and alt_text_length > 125:
+                counts['long_alt_count'] += 1
+        
+        if img_data['alt_text'] == '':
+            counts['empty_alt_count'] += 1
+    
+    return counts
+
+
+def create_scan_results(db: Session, scan_values: dict, images: List[dict]) -> models.ScanResult:
+    """
+    Insert a new scan and its image details in one transaction.
+    
+    The scan row is inserted with RETURNING so generated columns (id,
+    timestamps, computed percentages) come back without a refresh.
+    
+    Args:
+        db: Database session
+        scan_values: Column values for the new scan
+        images: Image data from the scanner
+        
+    Returns:
+        ScanResult: The inserted scan
+    """
+    scan = db.execute(
+        insert(models.ScanResult).values(**scan_values).returning(models.ScanResult)
+    ).scalar_one()
+    
+    insert_image_details(db, scan.id, images)
+    db.commit()
+    return scan
+
+
+def claim_scan_for_retry(db: Session, scan_id: int, user_id: int) -> Optional[models.ScanResult]:
+    """
+    Reset a failed or pending scan owned by the user back to pending.
+    
+    Args:
+        db: Database session
+        scan_id: Scan ID
+        user_id: ID of the user who must own the scan
+        
+    Returns:
+        Optional[ScanResult]: The claimed scan, or None if it is missing, owned
+        by someone else or not in a retryable state
+    """
+    scan = db.execute(
+        update(models.ScanResult).where(
+            models.ScanResult.id == scan_id,
+            models.ScanResult.user_id == user_id,
+            models.ScanResult.scan_status.in_(["failed", "pending"])
+        ).values(
+            scan_status="pending",
+            error_message=None
+        ).returning(models.ScanResult)
+    ).scalar_one_or_none()
+    db.commit()
+    return scan
+
+
+def mark_scan_failed(db: Session, scan_id: int, error_message: str) -> None:
+    """
+    Record a failed retry on a claimed scan.
+    
+    Args:
+        db: Database session
+        scan_id: Scan ID
+        error_message: Error to store on the scan
+    """
+    db.rollback()
+    db.execute(
+        update(models.ScanResult).where(
+            models.ScanResult.id == scan_id
+        ).values(
+            scan_status="failed",
+            error_message=error_message
+        )
+    )
+    db.commit()
+
+
+def save_scan_results(db: Session, scan_id: int, scan_values: dict, images: List[dict]) -> models.ScanResult:
+    """
+    Store new results on an existing scan and replace its image details in one transaction.
+    
+    Args:
+        db: Database session
+        scan_id: Scan ID
+        scan_values: Column values from the new scan results
+        images: Image data from the scanner
+        
+    Returns:
+        ScanResult: The updated scan, as returned by UPDATE ... RETURNING
+    """
+    db.query(models.ImageDetail).filter(models.ImageDetail.scan_result_id == scan_id).delete()
+    insert_image_details(db, scan_id, images)
+    
+    scan = db.execute(
+        update(models.ScanResult).where(
+            models.ScanResult.id == scan_id
+        ).values(**scan_values).returning(models.ScanResult)
+    ).scalar_one()
+    db.commit()
+    return scan
+
+
+def insert_image_details(db: Session, scan_id: int, images: List[dict]) -> None:
+    """
+    Insert image details for a scan in one executemany.
+    
+    Args:
+        db: Database session
+        scan_id: Scan ID the images belong to
+        images: Image data from the scanner
+    """
+    rows = [
+        {
+            'scan_result_id': scan_id,
+            'image_url': img_data['url'],
+            'alt_text': img_data['alt_text'],
+            'has_alt_text': img_data['has_alt_text'],
+            'alt_text_length': img_data['alt_text_length'],
+            'image_width': img_data.get('width'),
+            'image_height': img_data.get('height'),
+            'is_decorative': img_data['is_decorative']
+        }
+        for img_data in images
+    ]
+    if rows:
+        db.execute(insert(models.ImageDetail), rows)
+
+
+def fetch_all(db: Session, stmt) -> list:
+    """
+    Execute an ORM select and return all entities.
+    
+    Args:
+        db: Database session
+        stmt: Select or lambda statement
+        
+    Returns:
+        list: Loaded entities
+    """
+    return db.execute(stmt).scalars().all()
+
+
+def get_owned_scan(db: Session, scan_id: int, user_id: int) -> Optional[models.ScanResult]:
+    """
+    Load a scan by primary key if it belongs to the user.
+    
+    Uses Session.get so an already-loaded scan comes from the identity map
+    without SQL, and otherwise a plain primary key lookup. Relationships are
+    set to raise (see SCAN_LOAD_OPTIONS) so no hidden N+1 loads can sneak in.
+    
+    Args:
+        db: Database session
+        scan_id: Scan ID
+        user_id: ID of the user who must own the scan
+        
+    Returns:
+        Optional[ScanResult]: The scan, or None if missing or owned by someone else
+    """
+    scan = db.get(models.ScanResult, scan_id, options=SCAN_LOAD_OPTIONS)
+    if scan is None or scan.user_id != user_id:
+        return None
+    return scan
+
+
+def delete_scan_results(db: Session, scan_id: int, user_id: int) -> bool:
+    """
+    Delete a scan if it belongs to the user.
+    
+    Image details are removed by the database through the ON DELETE CASCADE
+    foreign key, so this is a single statement.
+    
+    Args:
+        db: Database session
+        scan_id: Scan ID
+        user_id: ID of the user who must own the scan
+        
+    Returns:
+        bool: True if the scan was deleted, False if it was not found
+    """
+    deleted = db.execute(
+        delete(models.ScanResult).where(
+            models.ScanResult.id == scan_id,
+            models.ScanResult.user_id == user_id
+        ).returning(models.ScanResult.id)
+    ).first()
+    db.commit()
+    
+    return deleted is not None
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encode keyset pagination values into an opaque cursor string.
+    
+    Args:
+        values: Sort key values of the last row on the page
+        
+    Returns:
+        str: Unpadded base64url cursor, safe to pass back in a query string
+    """
+    raw = ",".join(
+        value.isoformat() if isinstance(value, datetime) else str(int(value))
+        for value in values
+    )
+    return base64.urlsafe_b64encode(raw.encode()).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """
+    Decode a cursor produced by encode_cursor.
+    
+    Args:
+        cursor: Cursor string from the client
+        types: Expected type of each value (datetime, int or bool)
+        
+    Returns:
+        tuple: Decoded sort key values
+        
+    Raises:
+        HTTPException: If the cursor is malformed
+    """
+    try:
+        # binascii.Error and UnicodeDecodeError are both ValueErrors
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        parts = raw.split(",")
+        if len(parts) != len(types):
+            raise ValueError("Wrong number of cursor values")
+        return tuple(
+            datetime.fromisoformat(part) if value_type is datetime else value_type(int(part))
+            for part, value_type in zip(parts, types)
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination cursor"
+        )
+
+
+async def get_cached_scan_response(
+    redis_conn: redis.asyncio.Redis,
+    scan_id: int,
+    user_id: int,
+    name: str,
+    *params
+) -> Tuple[Optional[str], dict]:
+    """
+    Look up a cached scan response.
+    
+    Keys embed the scan's cache version, so bumping it on retry or delete
+    invalidates the scan and every cached image page at once.
+    
+    Args:
+        redis_conn: Redis connection
+        scan_id: Scan ID
+        user_id: ID of the user who owns the scan
+        name: Endpoint name
+        *params: Other query parameters that affect the result
+        
+    Returns:
+        Tuple[Optional[str], dict]: Cache key (None if Redis is unavailable)
+        and the cached fields, empty on a miss
+    """
+    try:
+        version = await redis_conn.get(scan_version_key(scan_id))
+        cache_key = ":".join([
+            "scan", name, str(scan_id), str(user_id), str(int(version or 0)),
+            *(str(param) for param in params)
+        ])
+        return cache_key, await redis_conn.hgetall(cache_key)
+    except redis.RedisError as e:
+        logger.warning("Scan cache unavailable: %s", e)
+        return None, {}
+
+
+async def cache_scan_response(
+    redis_conn: redis.asyncio.Redis,
+    cache_key: Optional[str],
+    content: bytes,
+    next_cursor: Optional[str] = None
+) -> None:
+    """
+    Store a serialized scan response in the cache.
+    
+    Args:
+        redis_conn: Redis connection
+        cache_key: Cache key from get_cached_scan_response, or None to skip caching
+        content: Serialized JSON body
+        next_cursor: Pagination cursor to replay with the body, if any
+    """
+    if cache_key is None:
+        return
+    
+    try:
+        async with redis_conn.pipeline(transaction=False) as pipe:
+            pipe.hset(cache_key, mapping={"body": content, "next_cursor": next_cursor or ""})
+            pipe.expire(cache_key, SCAN_CACHE_TTL)
+            await pipe.execute()
+    except redis.RedisError as e:
+        logger.warning("Failed to cache scan response: %s", e)
+
+
+def scan_json_response(fields: dict, status_code: int = status.HTTP_200_OK) -> Response:
+    """
+    Build a JSON response from cached or freshly serialized scan fields.
+    
+    The body is already JSON bytes, so it bypasses response_model validation
+    and the default response class entirely.
+    
+    Args:
+        fields: Mapping with the JSON body and an optional next cursor
+        status_code: HTTP status of the response
+        
+    Returns:
+        Response: JSON response, with X-Next-Cursor set when there is a next page
+    """
+    headers = {}
+    if fields.get(b"next_cursor"):
+        headers["X-Next-Cursor"] = fields[b"next_cursor"].decode()
+    return Response(content=fields[b"body"], media_type="application/json", headers=headers, status_code=status_code)
@@ -1,7 +1,24 @@
-from pydantic import BaseModel, EmailStr, validator, Field
-from typing import Optional, List
+from pydantic import BaseModel, BeforeValidator, ConfigDict, EmailStr, Field, field_validator
+from typing import Annotated, Optional, List
 from datetime import datetime
 from enum import Enum
+import re
+
+# Any decimal digit, found in one C-level scan
+DIGIT_RE = re.compile(r'\d')
+
+# Cheap shape check that rejects obvious garbage before email-validator runs
+EMAIL_SHAPE_RE = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+
+
+def _precheck_email(v):
+    if isinstance(v, str) and not EMAIL_SHAPE_RE.fullmatch(v):
+        raise ValueError('value is not a valid email address')
+    return v
+
+
+# Email address with the shape precheck applied before email-validator
+Email = Annotated[EmailStr, BeforeValidator(_precheck_email)]
 
 
 class ScanStatus(str, Enum):
@@ -15,10 +32,11 @@ class ScanStatus(str, Enum):
 # User Schemas
 class UserBase(BaseModel):
     """Base user schema with common fields."""
-    email: EmailStr
+    email: Email
     username: str = Field(..., min_length=3, max_length=100)
 
-    @validator('username')
+    @field_validator('username')
+    @classmethod
     def validate_username(cls, v):
         if not v.isalnum():
             raise ValueError('Username must contain only alphanumeric characters')
@@ -29,47 +47,55 @@ class UserCreate(UserBase):
     """Schema for user creation."""
     password: str = Field(..., min_length=8, max_length=100)
 
-    @validator('password')
+    @field_validator('password')
+    @classmethod
     def validate_password(cls, v):
         if len(v) < 8:
             raise ValueError('Password must be at least 8 characters long')
-        if not any(c.isupper() for c in v):
+        # Case mapping changes the string only if it has letters of the other case
+        if v.lower() == v:
             raise ValueError('Password must contain at least one uppercase letter')
-        if not any(c.islower() for c in v):
+        if v.upper() == v:
             raise ValueError('Password must contain at least one lowercase letter')
-        if not any(c.isdigit() for c in v):
+        if not DIGIT_RE.search(v):
             raise ValueError('Password must contain at least one digit')
         return v
 
 
 class UserUpdate(BaseModel):
     """Schema for user updates."""
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
     username: Optional[str] = Field(None, min_length=3, max_length=100)
     is_active: Optional[bool] = None
 
-    @validator('username')
+    @field_validator('username')
+    @classmethod
     def validate_username(cls, v):
         if v is not None and not v.isalnum():
             raise ValueError('Username must contain only alphanumeric characters')
         return v.lower() if v else v
 
 
-class UserResponse(UserBase):
-    """Schema for user response."""
+class UserResponse(BaseModel):
+    """Schema for user response.
+    
+    Built from stored users, whose email and username were validated on
+    write, so they are plain strings here.
+    """
+    email: str
+    username: str
     id: int
     is_active: bool
     is_verified: bool
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserLogin(BaseModel):
     """Schema for user login."""
-    email: EmailStr
+    email: Email
     password: str
 
 
@@ -84,6 +110,7 @@ class TokenData(BaseModel):
     """Schema for JWT token data."""
     user_id: Optional[int] = None
     email: Optional[str] = None
+    exp: Optional[int] = None
 
 
 # Scan Result Schemas
@@ -91,7 +118,8 @@ class ScanResultBase(BaseModel):
     """Base scan result schema."""
     url: str = Field(..., min_length=1, max_length=2048)
 
-    @validator('url')
+    @field_validator('url')
+    @classmethod
     def validate_url(cls, v):
         if not v.startswith(('http://', 'https://')):
             raise ValueError('URL must start with http:// or https://')
@@ -128,8 +156,7 @@ class ScanResultResponse(ScanResultBase):
     updated_at: datetime
     user_id: int
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ScanResultSummary(BaseModel):
@@ -143,8 +170,7 @@ class ScanResultSummary(BaseModel):
     alt_text_coverage_percentage: float
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Image Detail Schemas
@@ -170,8 +196,7 @@ class ImageDetailResponse(ImageDetailBase):
     scan_result_id: int
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # Analytics Schemas
@@ -1,12 +1,54 @@
+import codecs
 import csv
 import io
 import logging
+import queue
+import threading
+from typing import Iterator
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from ..models import ScanResult, ImageDetail
 
 logger = logging.getLogger(__name__)
 
+# Rows fetched per server-side cursor batch when streaming CSV exports
+CSV_BATCH_SIZE = 500
+
+# Target size of each streamed CSV chunk (bytes)
+CSV_CHUNK_SIZE = 64 * 1024
+
+# PostgreSQL export: CSV_CHUNK_SIZE chunks of COPY output held between the
+# worker thread reading from the server and the response
+COPY_QUEUE_CHUNKS = 4
+
+# How often a COPY worker blocked on a full queue checks for cancellation (seconds)
+COPY_CANCEL_POLL_SECONDS = 0.5
+
+# Marks the end of COPY output on the chunk queue
+COPY_DONE = object()
+
+# Scan details rendered by PostgreSQL byte for byte like the row-by-row
+# export: same headers, Python-style booleans, empty fields left unquoted
+# (COPY quotes empty strings, so they are sent as NULL), ISO timestamps
+# with microseconds and \n line endings
+SCAN_DETAILS_COPY_SQL = """
+COPY (
+    SELECT
+        image_url AS "Image URL",
+        nullif(alt_text, '') AS "Alt Text",
+        CASE WHEN has_alt_text THEN 'True' ELSE 'False' END AS "Has Alt Text",
+        coalesce(alt_text_length, 0) AS "Alt Text Length",
+        CASE WHEN is_decorative THEN 'True' ELSE 'False' END AS "Is Decorative",
+        nullif(image_width, 0) AS "Width",
+        nullif(image_height, 0) AS "Height",
+        to_char(created_at, 'YYYY-MM-DD"T"HH24:MI:SS.USTZH:TZM') AS "Created At"
+    FROM image_details
+    WHERE scan_result_id = {scan_id}
+    ORDER BY id
+) TO STDOUT WITH (FORMAT csv, HEADER true)
+"""
+
 
 class DataExporter:
     """Export scan data in various formats."""
@@ -35,10 +77,94 @@ class DataExporter:
         if not scan:
             raise ValueError(f"Scan {scan_id} not found")
         
-        images = self.db.query(ImageDetail).filter(ImageDetail.scan_result_id == scan_id).all()
+        return "".join(self.iter_scan_details_csv(scan_id))
+    
+    def iter_scan_details_csv(self, scan_id: int) -> Iterator[str]:
+        """
+        Stream detailed image information for a scan as CSV chunks.
+        
+        On PostgreSQL the CSV is produced by the server with COPY TO STDOUT;
+        other databases fall back to encoding rows in Python. The caller is
+        responsible for checking that the scan exists.
+        
+        Args:
+            scan_id: Scan ID
+            
+        Returns:
+            Iterator[str]: CSV content, starting with the header row
+        """
+        if self.db.get_bind().dialect.name == "postgresql":
+            return self._iter_scan_details_copy(scan_id)
+        return self._iter_scan_details_rows(scan_id)
+    
+    def _iter_scan_details_copy(self, scan_id: int) -> Iterator[str]:
+        """
+        Stream scan details CSV rendered by PostgreSQL COPY.
+        
+        A worker thread runs COPY TO STDOUT and hands CSV_CHUNK_SIZE chunks
+        to this generator through a queue of COPY_QUEUE_CHUNKS, so the first
+        bytes go out while PostgreSQL is still producing rows and memory use
+        stays bounded. If the consumer stops early, the worker aborts the COPY.
+        
+        Args:
+            scan_id: Scan ID
+            
+        Yields:
+            str: CSV content
+        """
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        chunks = queue.Queue(maxsize=COPY_QUEUE_CHUNKS)
+        cancelled = threading.Event()
+        cursor = self.db.connection().connection.cursor()
+        
+        def run_copy():
+            target = CopyChunkWriter(chunks, cancelled)
+            try:
+                cursor.copy_expert(SCAN_DETAILS_COPY_SQL.format(scan_id=int(scan_id)), target)
+                target.flush()
+                target.put(COPY_DONE)
+            except CopyCancelled:
+                pass
+            except Exception as e:
+                try:
+                    target.put(e)
+                except CopyCancelled:
+                    pass
+        
+        worker = threading.Thread(target=run_copy, name=f"export-copy-{scan_id}", daemon=True)
+        worker.start()
+        try:
+            while (chunk := chunks.get()) is not COPY_DONE:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield decoder.decode(chunk)
+            
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+        finally:
+            # Unblocks a worker waiting on a full queue when the client goes away
+            cancelled.set()
+            worker.join()
+            cursor.close()
+    
+    def _iter_scan_details_rows(self, scan_id: int) -> Iterator[str]:
+        """
+        Stream scan details CSV encoded row by row.
+        
+        Rows are fetched with a server-side cursor in batches of
+        CSV_BATCH_SIZE and written into one reused buffer, which is flushed
+        whenever it reaches CSV_CHUNK_SIZE, so memory use does not grow with
+        the number of images.
         
+        Args:
+            scan_id: Scan ID
+            
+        Yields:
+            str: CSV content, starting with the header row
+        """
         output = io.StringIO()
-        writer = csv.writer(output)
+        writer = csv.writer(output, lineterminator='\n')
         
         # Write header
         writer.writerow([
@@ -46,20 +172,91 @@ class DataExporter:
             'Is Decorative', 'Width', 'Height', 'Created At'
         ])
         
+        result = self.db.execute(
+            select(
+                ImageDetail.image_url,
+                ImageDetail.alt_text,
+                ImageDetail.has_alt_text,
+                ImageDetail.alt_text_length,
+                ImageDetail.is_decorative,
+                ImageDetail.image_width,
+                ImageDetail.image_height,
+                ImageDetail.created_at
+            ).where(
+                ImageDetail.scan_result_id == scan_id
+            ).order_by(ImageDetail.id).execution_options(yield_per=CSV_BATCH_SIZE)
+        )
+        
         # Write data
-        for image in images:
-            writer.writerow([
-                image.image_url,
-                image.alt_text or '',
-                image.has_alt_text,
-                image.alt_text_length or 0,
-                image.is_decorative,
-                image.image_width or '',
-                image.image_height or '',
-                image.created_at.isoformat()
-            ])
-        
-        return output.getvalue()
+        for batch in result.partitions():
+            writer.writerows(
+                (
+                    image_url,
+                    alt_text or '',
+                    has_alt_text,
+                    alt_text_length or 0,
+                    is_decorative,
+                    image_width or '',
+                    image_height or '',
+                    created_at.isoformat(timespec='microseconds')
+                )
+                for (image_url, alt_text, has_alt_text, alt_text_length,
+                     is_decorative, image_width, image_height, created_at) in batch
+            )
+            if output.tell() >= CSV_CHUNK_SIZE:
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+        
+        # Remaining rows, or just the header when the scan has no images
+        if output.tell():
+            yield output.getvalue()
+
+
+class CopyCancelled(Exception):
+    """Raised inside COPY to abort it once the export is no longer being read."""
+
+
+class CopyChunkWriter:
+    """File-like COPY target that batches output into chunks on a bounded queue."""
+    
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        """
+        Initialize the writer.
+        
+        Args:
+            chunks: Queue the chunks are handed to
+            cancelled: Set when the reader has stopped
+        """
+        self.chunks = chunks
+        self.cancelled = cancelled
+        self.buffer = bytearray()
     
+    def write(self, data) -> int:
+        """Buffer COPY output (one row per call), handing off full chunks."""
+        self.buffer += data.encode() if isinstance(data, str) else data
+        if len(self.buffer) >= CSV_CHUNK_SIZE:
+            self.flush()
+        return len(data)
     
+    def flush(self) -> None:
+        """Hand off whatever is buffered."""
+        if self.buffer:
+            self.put(bytes(self.buffer))
+            self.buffer.clear()
     
+    def put(self, item) -> None:
+        """
+        Put an item on the queue, waiting while it is full.
+        
+        Raises:
+            CopyCancelled: If the reader stops while waiting
+        """
+        while True:
+            if self.cancelled.is_set():
+                raise CopyCancelled()
+            try:
+                self.chunks.put(item, timeout=COPY_CANCEL_POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
@@ -1,13 +1,34 @@
 import re
 import logging
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Union
 from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
 
 from ..utils.exceptions import ImageAnalysisError
 
 logger = logging.getLogger(__name__)
 
+# Prefer the C-backed lxml parser; fall back to the stdlib parser if it is missing
+try:
+    BeautifulSoup("", "lxml")
+    HTML_PARSER = "lxml"
+except FeatureNotFound:
+    HTML_PARSER = "html.parser"
+
+# background-image: url(...) in inline styles
+CSS_BACKGROUND_IMAGE_RE = re.compile(
+    r'background-image\s*:\s*url\s*\(\s*["\']?([^"\')\s]+)["\']?\s*\)',
+    re.IGNORECASE
+)
+
+# Anything in a relative URL that urljoin treats specially: a scheme, dot or
+# empty path segments, the tab/newline characters it strips, and empty
+# query, fragment or params components (a trailing '?', '#' or ';'), which it drops
+URL_JOIN_SPECIAL_RE = re.compile(r'[:\t\r\n]|/\.|//|[?#;](?![^?#;])')
+
+# Only img tags and styled elements are inspected, so nothing else is built
+IMAGE_STRAINER = SoupStrainer(lambda name, attrs: name == 'img' or 'style' in attrs)
+
 
 class ImageAnalyzer:
     """Simple and efficient image analyzer for alt text accessibility."""
@@ -16,22 +37,34 @@ class ImageAnalyzer:
         """Initialize image analyzer."""
         self.base_url = base_url
         self.parsed_base_url = urlparse(base_url)
+        
+        # Precomputed prefixes for resolving common relative URLs without urljoin
+        self._origin = f"{self.parsed_base_url.scheme}://{self.parsed_base_url.netloc}"
+        base_path = self.parsed_base_url.path
+        # urljoin collapses empty path segments, so only take the fast path for clean bases
+        self._base_dir = None if '//' in base_path else self._origin + base_path.rsplit('/', 1)[0] + '/'
     
-    def analyze_images(self, html_content: str) -> Dict[str, any]:
-        """Analyze all images in HTML content."""
+    def analyze_images(self, html_content: Union[bytes, str], encoding: Optional[str] = None) -> Dict[str, any]:
+        """Analyze all images in HTML content.
+        
+        Raw bytes are handed to the parser as-is so encoding detection happens
+        there; ``encoding`` is an optional hint such as the response charset.
+        """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            soup = BeautifulSoup(html_content, HTML_PARSER, parse_only=IMAGE_STRAINER, from_encoding=encoding)
             images = []
+            css_images = []
             
-            # Extract img tags
-            for img in soup.find_all('img'):
-                if src := img.get('src'):
-                    images.append(self._create_image_data(img, src, 'img'))
+            # Walk the tree once, collecting img tags and inline CSS background images
+            for element in soup.find_all(True):
+                if element.name == 'img' and (src := element.get('src')):
+                    images.append(self._create_image_data(element, src, 'img'))
+                if style := element.get('style'):
+                    for url in self._extract_css_urls(style):
+                        css_images.append(self._create_image_data(element, url, 'css'))
             
-            # Extract CSS background images
-            for element in soup.find_all(attrs={'style': True}):
-                for url in self._extract_css_urls(element.get('style', '')):
-                    images.append(self._create_image_data(element, url, 'css'))
+            # img tags are reported before CSS images
+            images.extend(css_images)
             
             return self._calculate_stats(images)
             
@@ -42,9 +75,10 @@ class ImageAnalyzer:
     def _create_image_data(self, element, src: str, source_type: str) -> Dict:
         """Create image data dictionary."""
         alt_text = element.get('alt', '') if source_type == 'img' else ''
-        has_alt = bool(alt_text and alt_text.strip())
-        is_decorative = alt_text.strip() == '' or source_type == 'css'
-        alt_length = len(alt_text.strip()) if alt_text else 0
+        stripped_alt = alt_text.strip()
+        has_alt = bool(stripped_alt)
+        is_decorative = not stripped_alt or source_type == 'css'
+        alt_length = len(stripped_alt)
         
         return {
             'url': self._resolve_url(src),
@@ -59,8 +93,10 @@ class ImageAnalyzer:
     
     def _extract_css_urls(self, css: str) -> List[str]:
         """Extract URLs from CSS background-image."""
-        pattern = r'background-image\s*:\s*url\s*\(\s*["\']?([^"\')\s]+)["\']?\s*\)'
-        return re.findall(pattern, css, re.IGNORECASE)
+        # Most inline styles never mention a background, so skip the regex for them
+        if 'background' not in css.lower():
+            return []
+        return CSS_BACKGROUND_IMAGE_RE.findall(css)
     
     def _resolve_url(self, url: str) -> str:
         """Resolve relative URL to absolute."""
@@ -69,7 +105,11 @@ class ImageAnalyzer:
         if url.startswith('//'):
             return f"{self.parsed_base_url.scheme}:{url}"
         if url.startswith('/'):
-            return f"{self.parsed_base_url.scheme}://{self.parsed_base_url.netloc}{url}"
+            return self._origin + url
+        # Plain path-relative URLs; urljoin also strips leading spaces and control
+        # characters and handles query/fragment-only references
+        if self._base_dir and url[0] > ' ' and url[0] not in '.?#' and not URL_JOIN_SPECIAL_RE.search(url):
+            return self._base_dir + url
         return urljoin(self.base_url, url)
     
     def _safe_int(self, value) -> Optional[int]:
@@ -82,8 +122,12 @@ class ImageAnalyzer:
     def _calculate_stats(self, images: List[Dict]) -> Dict:
         """Calculate analysis statistics."""
         total = len(images)
-        with_alt = sum(1 for img in images if img['has_alt_text'])
-        decorative = sum(1 for img in images if img['is_decorative'])
+        with_alt = decorative = 0
+        
+        # Count both flags in a single pass over the images
+        for img in images:
+            with_alt += img['has_alt_text']
+            decorative += img['is_decorative']
         
         return {
             'total_images': total,
@@ -2,7 +2,7 @@ import logging
 import time
 import asyncio
 import httpx
-from typing import Dict, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from ..utils.validators import validate_url_safe
 from ..utils.exceptions import ScanError, ValidationError, SecurityError
@@ -11,21 +11,52 @@ from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# HTTP/2 needs the optional h2 package; fall back to HTTP/1.1 without it
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
+
+# Connection pool shared by all scans in this process
+HTTP_CLIENT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+
+# Bytes read per chunk while streaming a page body
+FETCH_CHUNK_SIZE = 64 * 1024
+
+# Headers sent when retrying a page without certificate verification
+INSECURE_CLIENT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (compatible; Alt-Audit-Scanner/1.0)',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+}
+
+http_client: Optional[httpx.AsyncClient] = None
+insecure_http_client: Optional[httpx.AsyncClient] = None
+
 
 class URLScanner:
-    """Simple URL scanner with httpx and curl fallback for SSL issues."""
+    """Simple URL scanner with httpx and a non-verifying fallback for SSL issues."""
     
-    def __init__(self, timeout: int = 30):
+    def __init__(self, timeout: int = 30, client: Optional[httpx.AsyncClient] = None):
+        """
+        Initialize the scanner.
+        
+        Args:
+            timeout: Per-request timeout in seconds
+            client: HTTP client to fetch with (defaults to the shared client)
+        """
         self.timeout = timeout
-        self.client = None
+        self.client = client
     
     async def __aenter__(self):
-        self.client = httpx.AsyncClient(timeout=httpx.Timeout(self.timeout))
+        # Reuse the shared client so keep-alive connections survive across scans
+        if self.client is None:
+            self.client = get_http_client()
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.client:
-            await self.client.aclose()
+        # The client outlives the scanner; it is closed on application shutdown
+        pass
     
     async def scan_url(self, url: str) -> Dict[str, any]:
         """Scan a URL and analyze its images."""
@@ -33,12 +64,12 @@ class URLScanner:
         
         try:
             # Validate and fetch content
-            validated_url = validate_url_safe(url)
-            content = await self._fetch_content(validated_url)
+            validated_url = await validate_url_safe(url)
+            content, encoding = await self._fetch_content(validated_url)
             
-            # Analyze images
+            # Analyze images off the event loop (the parser decodes the raw bytes itself)
             analyzer = ImageAnalyzer(validated_url, self.timeout)
-            results = analyzer.analyze_images(content.decode('utf-8', errors='ignore'))
+            results = await asyncio.to_thread(analyzer.analyze_images, content, encoding)
             
             # Add metadata
             results.update({
@@ -55,48 +86,62 @@ class URLScanner:
             logger.error(f"Scan failed for {url}: {str(e)}")
             return self._create_error_result(url, str(e), start_time)
     
-    async def _fetch_content(self, url: str) -> bytes:
-        """Fetch content using httpx, fallback to curl for SSL issues."""
+    async def scan_urls(self, urls: List[str], concurrency: int = 10) -> List[Dict[str, any]]:
+        """Scan several URLs concurrently.
+        
+        Args:
+            urls: URLs to scan
+            concurrency: Maximum number of scans in flight at once
+            
+        Returns:
+            Scan results in the same order as ``urls``
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def scan_one(url: str) -> Dict[str, any]:
+            async with semaphore:
+                return await self.scan_url(url)
+        
+        # scan_url reports failures as error results, so one bad URL cannot cancel the rest
+        return await asyncio.gather(*(scan_one(url) for url in urls))
+    
+    async def _fetch_content(self, url: str) -> Tuple[bytes, Optional[str]]:
+        """Fetch content using httpx, retrying without certificate checks for SSL issues.
+        
+        Returns:
+            Raw body bytes and the declared charset, if any
+        """
         try:
-            # Try httpx first (works for most URLs)
-            response = await self.client.get(url)
-            response.raise_for_status()
-            return response.content
+            # Try the verifying client first (works for most URLs)
+            return await self._read_body(self.client, url)
         except Exception as e:
-            # Fallback to curl for SSL-problematic sites
+            # Fallback to the non-verifying client for SSL-problematic sites
             if "SSL" in str(e) or "TLS" in str(e):
-                logger.warning(f"SSL error with httpx, trying curl for {url}")
-                return await self._fetch_with_curl(url)
+                logger.warning(f"SSL error with httpx, retrying without certificate verification for {url}")
+                try:
+                    return await self._read_body(get_insecure_http_client(), url)
+                except Exception as retry_error:
+                    raise ScanError(f"Failed to fetch content: {str(retry_error)}")
             raise ScanError(f"Failed to fetch content: {str(e)}")
     
-    async def _fetch_with_curl(self, url: str) -> bytes:
-        """Fallback method using curl for SSL issues."""
-        curl_cmd = [
-            'curl', '-L', '--max-time', str(self.timeout), '--insecure', '--compressed',
-            '--user-agent', 'Mozilla/5.0 (compatible; Alt-Audit-Scanner/1.0)',
-            '--header', 'Accept: text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-            '--dump-header', '-', '--output', '-', url
-        ]
-        
-        process = await asyncio.create_subprocess_exec(
-            *curl_cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
-        )
-        
-        stdout, stderr = await process.communicate()
-        
-        if process.returncode != 0:
-            raise ScanError(f"Curl failed: {stderr.decode()}")
-        
-        # Parse headers and body
-        output = stdout.decode('utf-8', errors='ignore')
-        if '\r\n\r\n' in output:
-            _, body = output.split('\r\n\r\n', 1)
-            return body.encode('utf-8')
-        elif '\n\n' in output:
-            _, body = output.split('\n\n', 1)
-            return body.encode('utf-8')
-        else:
-            return stdout
+    async def _read_body(self, client: httpx.AsyncClient, url: str) -> Tuple[bytes, Optional[str]]:
+        """Stream a page body, rejecting it once it exceeds the size limit."""
+        async with client.stream('GET', url, timeout=self.timeout) as response:
+            response.raise_for_status()
+            
+            content_length = response.headers.get('content-length')
+            if content_length and content_length.isdigit() and int(content_length) > settings.max_page_size_bytes:
+                raise ScanError("Content too large")
+            
+            chunks = []
+            total = 0
+            async for chunk in response.aiter_bytes(FETCH_CHUNK_SIZE):
+                total += len(chunk)
+                if total > settings.max_page_size_bytes:
+                    raise ScanError("Content too large")
+                chunks.append(chunk)
+            
+            return b''.join(chunks), response.charset_encoding
     
     def _create_error_result(self, url: str, error_message: str, start_time: float) -> Dict[str, any]:
         """Create error result dictionary."""
@@ -113,3 +158,47 @@ class URLScanner:
             'error_message': str(error_message),
             'images': []
         }
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get or create the shared HTTP client used for fetching pages."""
+    global http_client
+    if http_client is None or http_client.is_closed:
+        http_client = httpx.AsyncClient(
+            http2=HTTP2_ENABLED,
+            limits=HTTP_CLIENT_LIMITS,
+            timeout=httpx.Timeout(settings.request_timeout_seconds)
+        )
+    return http_client
+
+
+def get_insecure_http_client() -> httpx.AsyncClient:
+    """Get or create the client used to retry pages that fail TLS verification."""
+    global insecure_http_client
+    if insecure_http_client is None or insecure_http_client.is_closed:
+        insecure_http_client = httpx.AsyncClient(
+            verify=False,
+            http2=HTTP2_ENABLED,
+            limits=HTTP_CLIENT_LIMITS,
+            timeout=httpx.Timeout(settings.request_timeout_seconds),
+            follow_redirects=True,
+            headers=INSECURE_CLIENT_HEADERS,
+            event_hooks={'request': [_check_request_target]}
+        )
+    return insecure_http_client
+
+
+async def _check_request_target(request: httpx.Request) -> None:
+    """Run the SSRF checks on every hop, including redirect targets."""
+    await validate_url_safe(str(request.url))
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP clients and their connection pools."""
+    global http_client, insecure_http_client
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+    if insecure_http_client is not None:
+        await insecure_http_client.aclose()
+        insecure_http_client = None
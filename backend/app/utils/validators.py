@@ -1,34 +1,37 @@
 import re
+import asyncio
 import ipaddress
-from urllib.parse import urlparse
-from typing import List, Optional, Tuple
+import time
+from urllib.parse import ParseResult, urlparse, urlunparse
+from typing import Dict, List, Optional, Tuple
 import socket
 import logging
 from .exceptions import ValidationError, SecurityError
+from ..config import settings
 
 logger = logging.getLogger(__name__)
 
+# Any of the suspicious URL patterns (credentials, fragments, script/data/file/ftp schemes)
+SUSPICIOUS_URL_RE = re.compile(r'@|#|javascript:|data:|vbscript:|file:|ftp:', re.IGNORECASE)
+
+# Characters allowed in a hostname
+HOSTNAME_RE = re.compile(r'^[a-zA-Z0-9.-]+$')
+
+# Hostnames kept in the DNS cache before the oldest entry is evicted
+DNS_CACHE_MAX_ENTRIES = 1024
+
+# hostname -> (expiry on the monotonic clock, resolved IP addresses)
+_dns_cache: Dict[str, Tuple[float, List[str]]] = {}
+
 
 class URLValidator:
     """URL validation and SSRF protection utilities."""
     
-    # Private IP ranges and localhost patterns
-    PRIVATE_IP_RANGES = [
-        ipaddress.IPv4Network('10.0.0.0/8'),
-        ipaddress.IPv4Network('172.16.0.0/12'),
-        ipaddress.IPv4Network('192.168.0.0/16'),
-        ipaddress.IPv4Network('127.0.0.0/8'),
-        ipaddress.IPv4Network('169.254.0.0/16'),  # Link-local
-        ipaddress.IPv4Network('224.0.0.0/4'),     # Multicast
-        ipaddress.IPv4Network('240.0.0.0/4'),     # Reserved
-    ]
-    
-    # IPv6 private ranges
-    PRIVATE_IPV6_RANGES = [
-        ipaddress.IPv6Network('::1/128'),         # localhost
-        ipaddress.IPv6Network('fc00::/7'),        # Unique local
-        ipaddress.IPv6Network('fe80::/10'),       # Link-local
-    ]
+    # Blocked ranges not covered by the ipaddress private/loopback/link-local,
+    # multicast (224.0.0.0/4) and reserved (240.0.0.0/4) flags
+    EXTRA_BLOCKED_IP_RANGES = (
+        ipaddress.IPv4Network('100.64.0.0/10'),   # Carrier-grade NAT
+    )
     
     # Blocked protocols
     BLOCKED_PROTOCOLS = ['file', 'ftp', 'gopher', 'jar', 'ldap', 'ldaps', 'mailto', 'netdoc']
@@ -55,13 +58,18 @@ class URLValidator:
         """
         self.allowed_domains = allowed_domains or self.ALLOWED_DOMAINS
         self.blocked_domains = blocked_domains or self.BLOCKED_DOMAINS
+        
+        # Case-folded once here so hostname checks do not rebuild them per call
+        self._blocked_lower = frozenset(domain.lower() for domain in self.blocked_domains)
+        self._allowed_suffixes = tuple(domain.lower() for domain in self.allowed_domains)
     
-    def validate_url(self, url: str) -> Tuple[bool, str]:
+    def validate_url(self, url: str, parsed: Optional[ParseResult] = None) -> Tuple[bool, str]:
         """
         Validate URL for security and format.
         
         Args:
             url: URL to validate
+            parsed: ``urlparse(url)``, if the caller already has it
             
         Returns:
             Tuple[bool, str]: (is_valid, error_message)
@@ -75,7 +83,8 @@ class URLValidator:
                 return False, "URL too long (max 2048 characters)"
             
             # Parse URL
-            parsed = urlparse(url)
+            if parsed is None:
+                parsed = urlparse(url)
             
             # Check protocol
             if parsed.scheme.lower() in self.BLOCKED_PROTOCOLS:
@@ -90,7 +99,7 @@ class URLValidator:
                 return False, "URL must have a valid hostname"
             
             # Validate hostname
-            is_valid_host, host_error = self._validate_hostname(parsed.netloc)
+            is_valid_host, host_error = self._validate_hostname(parsed.hostname or '')
             if not is_valid_host:
                 return False, host_error
             
@@ -109,22 +118,20 @@ class URLValidator:
         Validate hostname for SSRF protection.
         
         Args:
-            hostname: Hostname to validate
+            hostname: Hostname to validate, without port
             
         Returns:
             Tuple[bool, str]: (is_valid, error_message)
         """
-        # Remove port if present
-        hostname = hostname.split(':')[0]
+        hostname_lower = hostname.lower()
         
         # Check blocked domains
-        if hostname.lower() in [domain.lower() for domain in self.blocked_domains]:
+        if hostname_lower in self._blocked_lower:
             return False, f"Domain '{hostname}' is blocked"
         
         # Check allowed domains (if specified)
-        if self.allowed_domains:
-            if not any(hostname.lower().endswith(domain.lower()) for domain in self.allowed_domains):
-                return False, f"Domain '{hostname}' is not in allowed list"
+        if self._allowed_suffixes and not hostname_lower.endswith(self._allowed_suffixes):
+            return False, f"Domain '{hostname}' is not in allowed list"
         
         # Check for IP addresses
         if self._is_ip_address(hostname):
@@ -161,16 +168,13 @@ class URLValidator:
             if ip_obj.is_private or ip_obj.is_loopback or ip_obj.is_link_local:
                 return False, f"Private IP address '{ip}' is not allowed"
             
-            # Check against blocked ranges
-            for network in self.PRIVATE_IP_RANGES:
-                if ip_obj in network:
+            # The flags above already cover IPv6 loopback, unique local and link-local
+            if ip_obj.version == 4:
+                if ip_obj.is_multicast or ip_obj.is_reserved:
                     return False, f"IP address '{ip}' is in blocked range"
-            
-            # Check IPv6 ranges
-            if ip_obj.version == 6:
-                for network in self.PRIVATE_IPV6_RANGES:
+                for network in self.EXTRA_BLOCKED_IP_RANGES:
                     if ip_obj in network:
-                        return False, f"IPv6 address '{ip}' is in blocked range"
+                        return False, f"IP address '{ip}' is in blocked range"
             
             return True, ""
             
@@ -191,7 +195,7 @@ class URLValidator:
             return False
         
         # Check for valid characters
-        if not re.match(r'^[a-zA-Z0-9.-]+$', hostname):
+        if not HOSTNAME_RE.match(hostname):
             return False
         
         # Check that it doesn't start or end with dot or hyphen
@@ -214,47 +218,37 @@ class URLValidator:
         Returns:
             bool: True if suspicious patterns found
         """
-        suspicious_patterns = [
-            r'@',  # Username in URL
-            r'#',  # Fragment identifier
-            r'javascript:',  # JavaScript protocol
-            r'data:',  # Data URI
-            r'vbscript:',  # VBScript protocol
-            r'file:',  # File protocol
-            r'ftp:',  # FTP protocol
-        ]
-        
-        for pattern in suspicious_patterns:
-            if re.search(pattern, url, re.IGNORECASE):
-                return True
-        
-        return False
+        return SUSPICIOUS_URL_RE.search(url) is not None
     
-    def resolve_and_validate(self, url: str) -> Tuple[bool, str, Optional[str]]:
+    async def resolve_and_validate(self, url: str, parsed: Optional[ParseResult] = None) -> Tuple[bool, str, Optional[str]]:
         """
         Resolve URL and validate against SSRF attacks.
         
+        Resolution runs off the event loop and is cached per hostname for
+        DNS_CACHE_TTL_SECONDS; every resolved IP is still validated on each call.
+        
         Args:
             url: URL to resolve and validate
+            parsed: ``urlparse(url)``, if the caller already has it
             
         Returns:
             Tuple[bool, str, Optional[str]]: (is_valid, error_message, resolved_ip)
         """
         try:
-            parsed = urlparse(url)
-            hostname = parsed.netloc.split(':')[0]
+            if parsed is None:
+                parsed = urlparse(url)
+            hostname = parsed.hostname or ''
             
             # Resolve hostname to IP
             try:
-                resolved_ips = socket.getaddrinfo(hostname, None, socket.AF_UNSPEC)
-                for family, _, _, _, sockaddr in resolved_ips:
-                    ip = sockaddr[0]
+                resolved_ips = await resolve_hostname(hostname)
+                for ip in resolved_ips:
                     is_valid, error = self._validate_ip_address(ip)
                     if not is_valid:
                         return False, f"Resolved IP '{ip}' is not allowed: {error}", ip
                 
                 # If we get here, all resolved IPs are valid
-                return True, "", resolved_ips[0][4][0] if resolved_ips else None
+                return True, "", resolved_ips[0] if resolved_ips else None
                 
             except socket.gaierror:
                 return False, f"Could not resolve hostname '{hostname}'", None
@@ -264,7 +258,42 @@ class URLValidator:
             return False, f"Error resolving URL: {str(e)}", None
 
 
-def validate_url_safe(url: str) -> str:
+async def resolve_hostname(hostname: str) -> List[str]:
+    """
+    Resolve a hostname to its IP addresses, caching the result.
+    
+    Args:
+        hostname: Hostname to resolve
+        
+    Returns:
+        List[str]: Resolved IP addresses
+        
+    Raises:
+        socket.gaierror: If the hostname cannot be resolved
+    """
+    now = time.monotonic()
+    cached = _dns_cache.get(hostname)
+    if cached and cached[0] > now:
+        return cached[1]
+    
+    # getaddrinfo blocks, so the event loop runs it in its executor
+    loop = asyncio.get_running_loop()
+    addresses = await loop.getaddrinfo(hostname, None, family=socket.AF_UNSPEC)
+    ips = [sockaddr[0] for _, _, _, _, sockaddr in addresses]
+    
+    # Evict the oldest entry once the cache is full
+    _dns_cache.pop(hostname, None)
+    if len(_dns_cache) >= DNS_CACHE_MAX_ENTRIES:
+        _dns_cache.pop(next(iter(_dns_cache)))
+    _dns_cache[hostname] = (now + settings.dns_cache_ttl_seconds, ips)
+    return ips
+
+
+# Shared validator with the default domain lists
+URL_VALIDATOR = URLValidator()
+
+
+async def validate_url_safe(url: str) -> str:
     """
     Validate URL and return cleaned version.
     
@@ -278,20 +307,25 @@ def validate_url_safe(url: str) -> str:
         ValidationError: If URL is invalid
         SecurityError: If URL poses security risk
     """
-    validator = URLValidator()
+    validator = URL_VALIDATOR
+    
+    # Parse once for every check; validate_url reports anything unparseable
+    try:
+        parsed = urlparse(url) if isinstance(url, str) else None
+    except ValueError:
+        parsed = None
     
     # Basic validation
-    is_valid, error = validator.validate_url(url)
+    is_valid, error = validator.validate_url(url, parsed)
     if not is_valid:
         raise ValidationError(f"Invalid URL: {error}")
     
     # SSRF validation
-    is_safe, error, resolved_ip = validator.resolve_and_validate(url)
+    is_safe, error, resolved_ip = await validator.resolve_and_validate(url, parsed)
     if not is_safe:
         raise SecurityError(f"URL security check failed: {error}")
     
-    # Return cleaned URL
-    parsed = urlparse(url)
-    return f"{parsed.scheme}://{parsed.netloc}{parsed.path}{'?' + parsed.query if parsed.query else ''}"
+    # Return cleaned URL (without params or fragment)
+    return urlunparse((parsed.scheme, parsed.netloc, parsed.path, '', parsed.query, ''))
 
 
@@ -216,18 +216,14 @@ def sample_html_with_css_images():
     """
 
 @pytest.fixture
-def mock_httpx_client():
-    """Mock httpx client for testing."""
-    from unittest.mock import AsyncMock, MagicMock
+def mock_transport_client(sample_html):
+    """httpx client that serves sample_html for every request."""
+    import httpx
     
-    mock_client = AsyncMock()
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.text = "<html><body><img src='test.jpg' alt='test'></body></html>"
-    mock_response.headers = {"content-type": "text/html"}
+    def handler(request):
+        return httpx.Response(200, text=sample_html, headers={"content-type": "text/html; charset=utf-8"})
     
-    mock_client.get.return_value = mock_response
-    return mock_client
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
 
 @pytest.fixture
 def mock_redis():
@@ -243,3 +239,21 @@ def mock_redis():
     mock_redis.expire.return_value = True
     
     return mock_redis
+
+@pytest.fixture
+def fake_redis():
+    """In-process Redis with Lua scripting, installed as the shared client.
+    
+    Every lookup gets its own connection to one fake server, so the data is
+    shared across the event loops that asyncio.run and TestClient create.
+    """
+    import fakeredis
+    import fakeredis.aioredis
+    from unittest.mock import patch
+    
+    server = fakeredis.FakeServer()
+    with patch(
+        "app.dependencies.get_redis_client",
+        side_effect=lambda: fakeredis.aioredis.FakeRedis(server=server)
+    ):
+        yield fakeredis.aioredis.FakeRedis(server=server)
@@ -349,3 +349,31 @@ def test_analytics_edge_cases(client: TestClient, auth_headers, db_session, test
     data = response.json()
     assert data["total_scans"] == 2
     assert data["average_coverage_percentage"] == 50.0  # (0 + 100) / 2
+
+def test_analytics_cache_invalidated_by_version_bump(fake_redis):
+    """Test bumping a user's analytics version misses their cached results only."""
+    import asyncio
+    from app.dependencies import invalidate_analytics_cache
+    from app.routers.analytics import get_cached_analytics, cache_analytics
+    
+    start_date = datetime(2024, 1, 1)
+    
+    async def run():
+        cache_key, cached = await get_cached_analytics(fake_redis, 1, "summary", start_date, 30)
+        assert cached is None
+        await cache_analytics(fake_redis, cache_key, {"total_scans": 3})
+        other_key, _ = await get_cached_analytics(fake_redis, 2, "summary", start_date, 30)
+        await cache_analytics(fake_redis, other_key, {"total_scans": 5})
+        
+        _, cached = await get_cached_analytics(fake_redis, 1, "summary", start_date, 30)
+        assert cached == b'{"total_scans":3}'
+        
+        await invalidate_analytics_cache(1)
+        new_key, cached = await get_cached_analytics(fake_redis, 1, "summary", start_date, 30)
+        assert new_key != cache_key and cached is None
+        
+        # Other users keep their cached results
+        _, cached = await get_cached_analytics(fake_redis, 2, "summary", start_date, 30)
+        assert cached == b'{"total_scans":5}'
+    
+    asyncio.run(run())
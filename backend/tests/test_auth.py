@@ -4,6 +4,7 @@ from sqlalchemy.orm import Session
 
 from app.models import User
 from app.auth import get_password_hash, verify_password, create_access_token, verify_token
+from app.auth import hash_password_async, verify_password_async
 
 def test_password_hashing():
     """Test password hashing and verification."""
@@ -14,6 +15,18 @@ def test_password_hashing():
     assert verify_password(password, hashed)
     assert not verify_password("wrongpassword", hashed)
 
+def test_password_hashing_async():
+    """Test async password hashing and verification helpers."""
+    import asyncio
+    
+    password = "testpassword"
+    hashed = asyncio.run(hash_password_async(password))
+    
+    assert hashed != password
+    assert asyncio.run(verify_password_async(password, hashed))
+    assert not asyncio.run(verify_password_async("wrongpassword", hashed))
+    assert verify_password(password, hashed)
+
 def test_jwt_token_creation():
     """Test JWT token creation and verification."""
     user_id = 1
@@ -34,6 +47,14 @@ def test_jwt_token_verification_invalid():
     with pytest.raises(Exception):
         verify_token(invalid_token)
 
+def test_jwt_token_verification_malformed():
+    """Test JWT token verification rejects structurally invalid tokens."""
+    valid_token = create_access_token(data={"sub": "1", "email": "test@example.com"})
+    
+    for token in ["", "a.b", valid_token + ".extra", "x" * 5000, valid_token[:-4] + "AAAA"]:
+        with pytest.raises(Exception):
+            verify_token(token)
+
 def test_register_user(client: TestClient, db_session: Session):
     """Test user registration."""
     user_data = {
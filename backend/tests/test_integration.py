@@ -2,14 +2,13 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 from unittest.mock import patch, MagicMock
+import httpx
 import json
 
 def test_complete_scan_workflow(client: TestClient, auth_headers, db_session, test_user):
     """Test complete scan workflow from creation to completion."""
     # Mock HTTP client for fetching website content
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.text = """
+    page = """
     <!DOCTYPE html>
     <html>
     <head><title>Test Page</title></head>
@@ -20,11 +19,11 @@ def test_complete_scan_workflow(client: TestClient, auth_headers, db_session, te
     </body>
     </html>
     """
-    mock_response.headers = {"content-type": "text/html"}
     
-    with patch("app.services.scanner.httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value.get.return_value = mock_response
-        
+    def handler(request):
+        return httpx.Response(200, text=page, headers={"content-type": "text/html"})
+    
+    with patch("app.services.scanner.http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))):
         # 1. Create scan
         scan_data = {"url": "https://example.com"}
         response = client.post("/api/v1/scans/", json=scan_data, headers=auth_headers)
@@ -198,6 +197,58 @@ def test_data_export_integration(client: TestClient, auth_headers, db_session, t
     assert response.status_code == 200
     assert response.headers["content-type"] == "application/json"
 
+def test_scan_details_export_paths_match():
+    """Test the COPY and row-by-row scan detail exports produce identical CSV."""
+    from datetime import datetime, timezone
+    from sqlalchemy.exc import OperationalError
+    from app.database import Base, engine
+    from app.models import User, ScanResult, ImageDetail
+    from app.services.export import DataExporter
+    
+    if engine.dialect.name != "postgresql":
+        pytest.skip("COPY export needs PostgreSQL")
+    try:
+        connection = engine.connect()
+    except OperationalError:
+        pytest.skip("PostgreSQL is not reachable")
+    
+    with connection:
+        transaction = connection.begin()
+        session = Session(bind=connection)
+        try:
+            Base.metadata.create_all(bind=connection)
+            user = User(username="exportuser", email="export@example.com", hashed_password="x")
+            session.add(user)
+            session.flush()
+            scan = ScanResult(url="https://example.com", user_id=user.id, scan_status="completed")
+            session.add(scan)
+            session.flush()
+            
+            # Missing, empty and quoted alt text; whole-second and fractional timestamps
+            alt_texts = [None, "", "plain", 'with, comma and "quotes"', "two\nlines"]
+            for i, alt_text in enumerate(alt_texts):
+                session.add(ImageDetail(
+                    scan_result_id=scan.id,
+                    image_url=f"https://example.com/{i}.png",
+                    alt_text=alt_text,
+                    has_alt_text=bool(alt_text),
+                    alt_text_length=len(alt_text) if alt_text else None,
+                    image_width=100 * i or None,
+                    image_height=0 if i == 2 else 50,
+                    is_decorative=alt_text == "",
+                    created_at=datetime(2024, 1, 2, 3, 4, 5, 6789 * i, tzinfo=timezone.utc)
+                ))
+            session.flush()
+            
+            exporter = DataExporter(session)
+            copy_csv = "".join(exporter._iter_scan_details_copy(scan.id))
+            rows_csv = "".join(exporter._iter_scan_details_rows(scan.id))
+            assert copy_csv.count("\n") == len(alt_texts) + 2
+            assert copy_csv == rows_csv
+        finally:
+            session.close()
+            transaction.rollback()
+
 def test_health_check_integration(client: TestClient):
     """Test health check integration."""
     # Test basic health check
@@ -1,13 +1,12 @@
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import patch, MagicMock
+import httpx
 import json
 
-def test_create_scan_success(client: TestClient, auth_headers, mock_httpx_client):
+def test_create_scan_success(client: TestClient, auth_headers, mock_transport_client):
     """Test successful scan creation."""
-    with patch("app.services.scanner.httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value = mock_httpx_client
-        
+    with patch("app.services.scanner.http_client", mock_transport_client):
         scan_data = {
             "url": "https://example.com"
         }
@@ -96,6 +95,26 @@ def test_get_scan_by_id(client: TestClient, auth_headers, test_scan_result):
     assert data["id"] == test_scan_result.id
     assert data["url"] == test_scan_result.url
 
+def test_get_scan_by_id_query_count(client: TestClient, auth_headers, test_scan_result):
+    """Test getting scan by ID does not lazy load relationships."""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    
+    statements = []
+    
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "scan_results" in statement or "image_details" in statement:
+            statements.append(statement)
+    
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        response = client.get(f"/api/v1/scans/{test_scan_result.id}", headers=auth_headers)
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    
+    assert response.status_code == 200
+    assert len(statements) <= 2
+
 def test_get_scan_by_id_not_found(client: TestClient, auth_headers):
     """Test getting non-existent scan."""
     response = client.get("/api/v1/scans/99999", headers=auth_headers)
@@ -155,11 +174,9 @@ def test_delete_scan_unauthorized(client: TestClient, test_scan_result, auth_hea
     response = client.delete(f"/api/v1/scans/{test_scan_result.id}", headers=auth_headers_2)
     assert response.status_code == 404
 
-def test_retry_scan(client: TestClient, auth_headers, test_scan_result, mock_httpx_client):
+def test_retry_scan(client: TestClient, auth_headers, test_scan_result, mock_transport_client):
     """Test retrying scan."""
-    with patch("app.services.scanner.httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value = mock_httpx_client
-        
+    with patch("app.services.scanner.http_client", mock_transport_client):
         response = client.post(f"/api/v1/scans/{test_scan_result.id}/retry", headers=auth_headers)
         assert response.status_code == 200
         
@@ -171,13 +188,15 @@ def test_retry_scan_not_found(client: TestClient, auth_headers):
     response = client.post("/api/v1/scans/99999/retry", headers=auth_headers)
     assert response.status_code == 404
 
-def test_scan_rate_limiting(client: TestClient, auth_headers, mock_redis):
+def test_scan_rate_limiting(client: TestClient, auth_headers, test_user, fake_redis):
     """Test scan rate limiting."""
-    with patch("app.dependencies.get_redis", return_value=mock_redis):
-        # Mock rate limit exceeded
-        mock_redis.incr.return_value = 11  # Exceed limit
-        mock_redis.exists.return_value = True
-        
+    import asyncio
+    from datetime import datetime
+    
+    # Daily counter already at the limit
+    asyncio.run(fake_redis.set(f"scans:{test_user.id}:{datetime.utcnow().date().isoformat()}", 100))
+    
+    with patch("app.routers.scans.validate_url_safe", side_effect=lambda url: url):
         scan_data = {
             "url": "https://example.com"
         }
@@ -185,11 +204,9 @@ def test_scan_rate_limiting(client: TestClient, auth_headers, mock_redis):
         response = client.post("/api/v1/scans/", json=scan_data, headers=auth_headers)
         assert response.status_code == 429
 
-def test_scan_with_background_task(client: TestClient, auth_headers, mock_httpx_client):
+def test_scan_with_background_task(client: TestClient, auth_headers, mock_transport_client):
     """Test scan with background task execution."""
-    with patch("app.services.scanner.httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value = mock_httpx_client
-        
+    with patch("app.services.scanner.http_client", mock_transport_client):
         scan_data = {
             "url": "https://example.com"
         }
@@ -237,14 +254,13 @@ def test_scan_private_network_protection(client: TestClient, auth_headers):
         response = client.post("/api/v1/scans/", json=scan_data, headers=auth_headers)
         assert response.status_code == 400
 
-def test_scan_content_type_validation(client: TestClient, auth_headers, mock_httpx_client):
+def test_scan_content_type_validation(client: TestClient, auth_headers):
     """Test content type validation."""
     # Mock response with invalid content type
-    mock_httpx_client.get.return_value.headers = {"content-type": "application/pdf"}
+    def handler(request):
+        return httpx.Response(200, content=b"%PDF-1.4", headers={"content-type": "application/pdf"})
     
-    with patch("app.services.scanner.httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value = mock_httpx_client
-        
+    with patch("app.services.scanner.http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))):
         scan_data = {
             "url": "https://example.com/document.pdf"
         }
@@ -252,14 +268,13 @@ def test_scan_content_type_validation(client: TestClient, auth_headers, mock_htt
         response = client.post("/api/v1/scans/", json=scan_data, headers=auth_headers)
         assert response.status_code == 400
 
-def test_scan_content_size_validation(client: TestClient, auth_headers, mock_httpx_client):
+def test_scan_content_size_validation(client: TestClient, auth_headers):
     """Test content size validation."""
     # Mock response with oversized content
-    mock_httpx_client.get.return_value.text = "x" * (10 * 1024 * 1024)  # 10MB
+    def handler(request):
+        return httpx.Response(200, text="x" * (10 * 1024 * 1024), headers={"content-type": "text/html"})  # 10MB
     
-    with patch("app.services.scanner.httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value = mock_httpx_client
-        
+    with patch("app.services.scanner.http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))):
         scan_data = {
             "url": "https://example.com"
         }
@@ -267,14 +282,13 @@ def test_scan_content_size_validation(client: TestClient, auth_headers, mock_htt
         response = client.post("/api/v1/scans/", json=scan_data, headers=auth_headers)
         assert response.status_code == 400
 
-def test_scan_http_error_handling(client: TestClient, auth_headers, mock_httpx_client):
+def test_scan_http_error_handling(client: TestClient, auth_headers):
     """Test HTTP error handling."""
     # Mock HTTP error response
-    mock_httpx_client.get.return_value.status_code = 404
+    def handler(request):
+        return httpx.Response(404, text="Not Found")
     
-    with patch("app.services.scanner.httpx.AsyncClient") as mock_client:
-        mock_client.return_value.__aenter__.return_value = mock_httpx_client
-        
+    with patch("app.services.scanner.http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))):
         scan_data = {
             "url": "https://example.com/notfound"
         }
@@ -284,13 +298,225 @@ def test_scan_http_error_handling(client: TestClient, auth_headers, mock_httpx_c
 
 def test_scan_timeout_handling(client: TestClient, auth_headers):
     """Test scan timeout handling."""
-    with patch("app.services.scanner.httpx.AsyncClient") as mock_client:
-        # Mock timeout exception
-        mock_client.return_value.__aenter__.return_value.get.side_effect = Exception("Timeout")
-        
+    # Mock timeout exception
+    def handler(request):
+        raise httpx.ReadTimeout("Timeout", request=request)
+    
+    with patch("app.services.scanner.http_client", httpx.AsyncClient(transport=httpx.MockTransport(handler))):
         scan_data = {
             "url": "https://example.com"
         }
         
         response = client.post("/api/v1/scans/", json=scan_data, headers=auth_headers)
         assert response.status_code == 201  # Scan created but will fail in background
+
+def test_scan_limit_script_seeds_then_counts(db_session, test_user, fake_redis):
+    """Test the daily counter is seeded from the database and stops at the limit."""
+    import asyncio
+    from datetime import datetime
+    from fastapi import HTTPException
+    from app.dependencies import check_user_scan_limit, refund_user_scan
+    from app.models import ScanResult
+    
+    db_session.add(ScanResult(url="https://example.com", user_id=test_user.id, scan_status="completed"))
+    db_session.commit()
+    counter_key = f"scans:{test_user.id}:{datetime.utcnow().date().isoformat()}"
+    
+    async def run():
+        # First scan of the day seeds from the one stored scan, then counts
+        assert await check_user_scan_limit(test_user, db_session) is True
+        assert await fake_redis.get(counter_key) == b"2"
+        assert await fake_redis.ttl(counter_key) > 0
+        
+        assert await check_user_scan_limit(test_user, db_session) is True
+        assert await fake_redis.get(counter_key) == b"3"
+        
+        # Over the limit: rejected and the increment is undone
+        with pytest.raises(HTTPException) as exc_info:
+            await check_user_scan_limit(test_user, db_session)
+        assert exc_info.value.status_code == 429
+        assert await fake_redis.get(counter_key) == b"3"
+        
+        # A refunded scan frees a slot again
+        await refund_user_scan(test_user)
+        assert await fake_redis.get(counter_key) == b"2"
+        assert await check_user_scan_limit(test_user, db_session) is True
+    
+    with patch("app.dependencies.get_user_scans_limit", return_value=3):
+        asyncio.run(run())
+
+def test_scan_refund_never_creates_counter(test_user, fake_redis):
+    """Test a refund without a counted scan leaves Redis untouched."""
+    import asyncio
+    from app.dependencies import refund_user_scan
+    
+    async def run():
+        await refund_user_scan(test_user)
+        assert await fake_redis.keys("scans:*") == []
+    
+    asyncio.run(run())
+
+def test_scan_limit_falls_back_to_database(db_session, test_user):
+    """Test the limit is enforced from the database when Redis is down."""
+    import asyncio
+    import redis
+    from fastapi import HTTPException
+    from app.dependencies import check_user_scan_limit
+    from app.models import ScanResult
+    
+    db_session.add(ScanResult(url="https://example.com", user_id=test_user.id, scan_status="completed"))
+    db_session.commit()
+    
+    with patch("app.dependencies.get_redis_client", side_effect=redis.ConnectionError("down")):
+        with patch("app.dependencies.get_user_scans_limit", return_value=2):
+            assert asyncio.run(check_user_scan_limit(test_user, db_session)) is True
+        
+        with patch("app.dependencies.get_user_scans_limit", return_value=1):
+            with pytest.raises(HTTPException) as exc_info:
+                asyncio.run(check_user_scan_limit(test_user, db_session))
+            assert exc_info.value.status_code == 429
+
+def test_scan_cache_invalidated_by_version_bump(fake_redis):
+    """Test bumping the scan version misses every previously cached response."""
+    import asyncio
+    from app.dependencies import invalidate_scan_cache
+    from app.routers.scans import get_cached_scan_response, cache_scan_response
+    
+    async def run():
+        detail_key, cached = await get_cached_scan_response(fake_redis, 7, 1, "detail")
+        assert cached == {}
+        images_key, _ = await get_cached_scan_response(fake_redis, 7, 1, "images", 0, 50, None, None)
+        await cache_scan_response(fake_redis, detail_key, b'{"id": 7}')
+        await cache_scan_response(fake_redis, images_key, b"[]", "abc")
+        
+        _, cached = await get_cached_scan_response(fake_redis, 7, 1, "detail")
+        assert cached == {b"body": b'{"id": 7}', b"next_cursor": b""}
+        _, cached = await get_cached_scan_response(fake_redis, 7, 1, "images", 0, 50, None, None)
+        assert cached[b"next_cursor"] == b"abc"
+        
+        await invalidate_scan_cache(7)
+        new_key, cached = await get_cached_scan_response(fake_redis, 7, 1, "detail")
+        assert new_key != detail_key and cached == {}
+        _, cached = await get_cached_scan_response(fake_redis, 7, 1, "images", 0, 50, None, None)
+        assert cached == {}
+        
+        # Another scan's version is untouched by the bump
+        assert await get_cached_scan_response(fake_redis, 8, 1, "detail") == ("scan:detail:8:1:0", {})
+    
+    asyncio.run(run())
+
+def test_scanner_uses_injected_client(mock_transport_client):
+    """Test URLScanner fetches through the client it is given."""
+    import asyncio
+    from app.services.scanner import URLScanner
+    
+    async def scan():
+        async with URLScanner(client=mock_transport_client) as scanner:
+            result = await scanner.scan_url("https://93.184.216.34/page")
+        await mock_transport_client.aclose()
+        return result
+    
+    result = asyncio.run(scan())
+    assert result["scan_status"] == "completed"
+    assert result["total_images"] == 4
+    assert result["images_with_alt"] == 1
+
+def test_pagination_cursor_is_url_safe():
+    """Test cursors survive a query string and reject tampered values."""
+    from datetime import datetime, timezone
+    from urllib.parse import quote
+    from fastapi import HTTPException
+    from app.routers.scans import encode_cursor, decode_cursor
+    
+    created_at = datetime(2024, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc)
+    cursor = encode_cursor(True, created_at, 42)
+    
+    assert quote(cursor, safe="") == cursor
+    assert decode_cursor(cursor, bool, datetime, int) == (True, created_at, 42)
+    
+    for bad in ["not a cursor", "MjAyNA", encode_cursor(1, 2), "%%%"]:
+        with pytest.raises(HTTPException) as exc_info:
+            decode_cursor(bad, bool, datetime, int)
+        assert exc_info.value.status_code == 400
+
+def test_scan_list_cursor_paging(db_session, test_user):
+    """Test cursor paging walks every scan once, ties included, and overrides skip."""
+    import asyncio
+    from datetime import datetime
+    from app.models import ScanResult
+    from app.routers.scans import get_user_scans
+    
+    # Identical timestamps so only the id tie-breaker orders the rows
+    created_at = datetime(2024, 1, 1, 12, 0, 0)
+    scans = [
+        ScanResult(url=f"https://example.com/{i}", user_id=test_user.id, scan_status="completed", created_at=created_at)
+        for i in range(5)
+    ]
+    db_session.add_all(scans)
+    db_session.commit()
+    expected_ids = sorted((scan.id for scan in scans), reverse=True)
+    
+    def fetch_page(skip=0, cursor=None):
+        response = asyncio.run(get_user_scans(
+            current_user=test_user, db=db_session, skip=skip, limit=2, cursor=cursor,
+            status_filter=None, start_date=None, end_date=None
+        ))
+        return [scan["id"] for scan in json.loads(response.body)], response.headers.get("x-next-cursor")
+    
+    seen_ids = []
+    page_ids, cursor = fetch_page()
+    seen_ids += page_ids
+    while cursor:
+        page_ids, next_cursor = fetch_page(cursor=cursor)
+        
+        # skip is ignored once a cursor is given
+        assert fetch_page(skip=3, cursor=cursor) == (page_ids, next_cursor)
+        seen_ids += page_ids
+        cursor = next_cursor
+    
+    assert seen_ids == expected_ids
+    assert fetch_page(skip=2)[0] == expected_ids[2:4]
+
+def test_insecure_client_checks_redirect_targets():
+    """Test the non-verifying client runs the SSRF checks on every redirect hop."""
+    import asyncio
+    import httpx
+    from app.services.scanner import get_insecure_http_client, close_http_client
+    from app.utils.exceptions import ValidationError, SecurityError
+    
+    def handler(request):
+        return httpx.Response(302, headers={"location": "http://10.0.0.5/admin"})
+    
+    async def fetch():
+        insecure = get_insecure_http_client()
+        client = httpx.AsyncClient(
+            transport=httpx.MockTransport(handler),
+            follow_redirects=insecure.follow_redirects,
+            event_hooks=insecure.event_hooks
+        )
+        try:
+            await client.get("https://93.184.216.34/page")
+        finally:
+            await client.aclose()
+            await close_http_client()
+    
+    with pytest.raises((ValidationError, SecurityError)):
+        asyncio.run(fetch())
+
+def test_image_url_resolution_matches_urljoin():
+    """Test relative image URLs resolve exactly as urljoin would."""
+    from urllib.parse import urljoin
+    from app.services.image_analyzer import ImageAnalyzer
+    
+    bases = ["https://example.com", "https://example.com/dir/page", "https://example.com/a//b/page"]
+    urls = [
+        "img.png", "sub/img.png?w=1#top", " sp.png", "\timg.png", "a\nb.png", "a\r\nb.png",
+        "\x01img.png", "img.png ", "./img.png", "../img.png", "?q=1", "#frag", "a//b.png",
+        "data:image/png;base64,AAAA", "img.png:2x",
+        "img.png?", "img.png#", "img.png;", "img.png?#", "img.png?x#", "a;?x", "a;b.png", "img.png?x;y",
+    ]
+    
+    for base in bases:
+        analyzer = ImageAnalyzer(base)
+        for url in urls:
+            assert analyzer._resolve_url(url) == urljoin(base, url), (base, url)